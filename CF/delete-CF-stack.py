@@ -1,15 +1,39 @@
 import boto3
 import logging
+import logging.handlers
 from datetime import datetime, timezone
 import sys
 import argparse
 import os
 import time
+import random
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.config import Config
+
+# Client config: room in the connection pool for concurrent calls, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=50, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
+# Total time to wait for a stack deletion, as the waiter's default 30 s x 120 attempts
+STACK_DELETE_WAIT_SECONDS = 3600
+
+# Every stack status except DELETE_COMPLETE, so list_stacks skips deleted stacks server-side
+ACTIVE_STACK_STATUSES = [
+    'CREATE_IN_PROGRESS', 'CREATE_FAILED', 'CREATE_COMPLETE',
+    'ROLLBACK_IN_PROGRESS', 'ROLLBACK_FAILED', 'ROLLBACK_COMPLETE',
+    'DELETE_IN_PROGRESS', 'DELETE_FAILED',
+    'UPDATE_IN_PROGRESS', 'UPDATE_COMPLETE_CLEANUP_IN_PROGRESS', 'UPDATE_COMPLETE', 'UPDATE_FAILED',
+    'UPDATE_ROLLBACK_IN_PROGRESS', 'UPDATE_ROLLBACK_FAILED', 'UPDATE_ROLLBACK_COMPLETE_CLEANUP_IN_PROGRESS', 'UPDATE_ROLLBACK_COMPLETE',
+    'REVIEW_IN_PROGRESS',
+    'IMPORT_IN_PROGRESS', 'IMPORT_COMPLETE', 'IMPORT_ROLLBACK_IN_PROGRESS', 'IMPORT_ROLLBACK_FAILED', 'IMPORT_ROLLBACK_COMPLETE',
+]
 
 # Configure logging
 def setup_logger(log_file):
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
+    # Keep botocore's own chatter out of the run log
+    logging.getLogger('botocore').setLevel(logging.WARNING)
     
     # Create handlers
     console_handler = logging.StreamHandler()
@@ -22,20 +46,31 @@ def setup_logger(log_file):
     
     # Add handlers to the logger
     logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Buffer file writes; errors and a full buffer flush straight through
+    logger.addHandler(logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=file_handler))
+
+def build_stack_filter(cutoff_date, until_date, exclude_stacks, pattern=None):
+    """Build a predicate over stack summaries that only runs the checks the given criteria need."""
+    # A JMESPath filter can't do this: CreationTime is a parsed datetime, which JMESPath cannot
+    # range-compare, and contains() is case-sensitive, so the predicate is specialised in Python instead
+    # One closure per combination of criteria, each doing its checks inline in a single expression
+    if pattern:
+        pattern_lower = pattern.lower()
+        if exclude_stacks:
+            return lambda stack: (stack['StackName'] not in exclude_stacks and pattern_lower in stack['StackName'].lower()
+                                  and cutoff_date < stack['CreationTime'] <= until_date)
+        return lambda stack: pattern_lower in stack['StackName'].lower() and cutoff_date < stack['CreationTime'] <= until_date
+    if exclude_stacks:
+        return lambda stack: stack['StackName'] not in exclude_stacks and cutoff_date < stack['CreationTime'] <= until_date
+    return lambda stack: cutoff_date < stack['CreationTime'] <= until_date
 
 def list_stacks_created_between(cf_client, cutoff_date, until_date, exclude_stacks, pattern=None):
-    """List all CloudFormation stacks created between the specified cutoff date and until date, excluding specific stacks."""
-    stacks_to_delete = []
-    paginator = cf_client.get_paginator('describe_stacks')
-    for page in paginator.paginate():
-        for stack in page['Stacks']:
-            creation_time = stack['CreationTime']
-            if cutoff_date < creation_time <= until_date and stack['StackName'] not in exclude_stacks:
-                if pattern and pattern.lower() not in stack['StackName'].lower():
-                    continue
-                stacks_to_delete.append(stack['StackName'])
-    return stacks_to_delete
+    """List all CloudFormation stacks created between the specified cutoff date and until date, excluding the stack names in the exclude_stacks set."""
+    paginator = cf_client.get_paginator('list_stacks')
+    # Checks run cheapest first: set membership, then the substring match, then the date range
+    stack_filter = build_stack_filter(cutoff_date, until_date, exclude_stacks, pattern)
+    stacks = paginator.paginate(StackStatusFilter=ACTIVE_STACK_STATUSES).search('StackSummaries[]')
+    return [stack['StackName'] for stack in stacks if stack_filter(stack)]
 
 def delete_stack(cf_client, stack_name, retries=3):
     """Delete the specified CloudFormation stack with retry logic for DELETE_FAILED status."""
@@ -44,9 +79,12 @@ def delete_stack(cf_client, stack_name, retries=3):
             cf_client.delete_stack(StackName=stack_name)
             logging.info(f"Initiated deletion of stack: {stack_name}")
             
-            # Wait for the stack to reach a terminal state
+            # Wait for the stack to reach a terminal state; poll sooner than the 30 s default and
+            # at a randomised interval so concurrent deletions don't hit DescribeStacks in lockstep.
+            # The attempts scale with the delay, so the total wait stays at the default's 60 minutes
+            delay = random.randint(5, 15)
             waiter = cf_client.get_waiter('stack_delete_complete')
-            waiter.wait(StackName=stack_name)
+            waiter.wait(StackName=stack_name, WaiterConfig={'Delay': delay, 'MaxAttempts': math.ceil(STACK_DELETE_WAIT_SECONDS / delay)})
 
             logging.info(f"Successfully deleted stack: {stack_name}")
             return
@@ -63,26 +101,29 @@ def delete_stack(cf_client, stack_name, retries=3):
     logging.error(f"Failed to delete stack {stack_name} after {retries} attempts. Please investigate manually.")
 
 def read_exclude_stacks(file_path):
-    """Read the list of stack names to exclude from a file."""
+    """Read the set of stack names to exclude from a file."""
     if not os.path.isfile(file_path):
         logging.error(f"Exclude stacks file {file_path} not found!")
         sys.exit(1)
     with open(file_path, 'r') as file:
-        exclude_stacks = [line.strip() for line in file if line.strip()]
+        exclude_stacks = frozenset(line.strip() for line in file if line.strip())
     return exclude_stacks
 
-def delete_nested_stacks(cf_client, stack_name, retries=3):
+def delete_nested_stacks(cf_client, stack_name, retries=3, paginator=None):
     """Delete nested CloudFormation stacks in the correct order."""
     try:
-        response = cf_client.describe_stack_resources(StackName=stack_name)
+        # list_stack_resources returns compact summaries and pages past the 100 resources describe_stack_resources stops at;
+        # the paginator is built once per top-level stack and handed down the recursion
+        if paginator is None:
+            paginator = cf_client.get_paginator('list_stack_resources')
         nested_stacks = []
         
-        for resource in response['StackResources']:
-            if resource['ResourceType'] == 'AWS::CloudFormation::Stack':
+        for resource in paginator.paginate(StackName=stack_name).search('StackResourceSummaries[]'):
+            if resource['ResourceType'] == 'AWS::CloudFormation::Stack' and resource.get('PhysicalResourceId'):
                 nested_stacks.append(resource['PhysicalResourceId'])
         
         for nested_stack in nested_stacks:
-            delete_nested_stacks(cf_client, nested_stack, retries)
+            delete_nested_stacks(cf_client, nested_stack, retries, paginator)
         
         delete_stack(cf_client, stack_name, retries)
     
@@ -99,6 +140,7 @@ def main():
     parser.add_argument("--log-file", "-l", help="Log file to store the output")
     parser.add_argument("--log-dir", "-d", help="Directory to store the log file", default="./.script-logs")
     parser.add_argument("--pattern", "-p", help="Pattern to filter stacks for deletion")
+    parser.add_argument("--max-concurrency", "-c", type=int, default=20, help="Maximum number of stacks deleted at the same time, default is 20")
 
     args = parser.parse_args()
 
@@ -126,23 +168,21 @@ def main():
     setup_logger(log_file)
 
     # Handle exclude stacks
-    exclude_stacks = []
+    exclude_stacks = frozenset()
     if args.exclude_stacks:
         if os.path.isfile(args.exclude_stacks):
             exclude_stacks = read_exclude_stacks(args.exclude_stacks)
         else:
-            exclude_stacks = [stack.strip() for stack in args.exclude_stacks.split(',')]
+            exclude_stacks = frozenset(stack.strip() for stack in args.exclude_stacks.split(','))
 
-    cf_client = boto3.client('cloudformation')
+    cf_client = boto3.client('cloudformation', config=BOTO_CFG)
 
     stacks_to_delete = list_stacks_created_between(cf_client, cutoff_date, until_date, exclude_stacks, args.pattern)
     
     # Summary of stacks to delete
     logging.info(f"Found {len(stacks_to_delete)} stacks created between {args.cutoff_date} and {args.until_date}")
     if stacks_to_delete:
-        logging.info("Stacks to be deleted:")
-        for stack_name in stacks_to_delete:
-            logging.info(f" - {stack_name}")
+        logging.info("Stacks to be deleted:\n" + "\n".join(f" - {stack_name}" for stack_name in stacks_to_delete))
         
         # Prompt to delete all stacks
         if not args.force:
@@ -155,21 +195,35 @@ def main():
         else:
             delete_all = True
 
-    success = True  # Track the success of stack deletions
+    # Collect confirmations up front so the worker threads never contend on stdin
+    confirmed_stacks = []
     for stack_name in stacks_to_delete:
-        try:
-            if delete_all:
-                delete_nested_stacks(cf_client, stack_name)
+        if delete_all:
+            confirmed_stacks.append(stack_name)
+        else:
+            confirm_each = input(f"Do you want to delete the stack {stack_name}? (yes/no): ")
+            logging.info(f"User prompt response for {stack_name}: {confirm_each}")
+            if confirm_each.lower() == 'yes':
+                confirmed_stacks.append(stack_name)
             else:
-                confirm_each = input(f"Do you want to delete the stack {stack_name}? (yes/no): ")
-                logging.info(f"User prompt response for {stack_name}: {confirm_each}")
-                if confirm_each.lower() == 'yes':
-                    delete_nested_stacks(cf_client, stack_name)
-                else:
-                    logging.info(f"Skipping deletion of stack: {stack_name}")
-        except Exception as e:
-            logging.error(f"Error during deletion of stack {stack_name}: {e}")
-            success = False
+                logging.info(f"Skipping deletion of stack: {stack_name}")
+
+    success = True  # Track the success of stack deletions
+    if confirmed_stacks:
+        # Each deletion blocks on a waiter for minutes, so run them concurrently
+        with ThreadPoolExecutor(max_workers=max(1, min(args.max_concurrency, len(confirmed_stacks)))) as executor:
+            futures = {executor.submit(delete_nested_stacks, cf_client, stack_name): stack_name for stack_name in confirmed_stacks}
+            for future in as_completed(futures):
+                stack_name = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error during deletion of stack {stack_name}: {e}")
+                    success = False
+
+    # Flush the buffered log records before the log file is renamed
+    for handler in logging.getLogger().handlers:
+        handler.flush()
 
     # Rename the log file if any stack failed to delete; assign exit_code value for later call
     if not success:
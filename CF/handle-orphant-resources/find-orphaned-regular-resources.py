@@ -1,28 +1,34 @@
 import boto3
-import subprocess
-import json
+from datetime import datetime
+from botocore.config import Config
+
+# GetResources accepts at most 20 values per tag filter
+MAX_TAG_FILTER_VALUES = 20
+
+# Client config: room in the connection pool for concurrent calls, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=50, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
 
 def get_deleted_stacks(date_time):
-    command = [
-        "aws", "cloudformation", "list-stacks",
-        "--query", f"StackSummaries[?CreationTime >= `{date_time}` && StackStatus == 'DELETE_COMPLETE'].[StackName, StackId]",
-        "--output", "json"
+    # Parse the date once; CreationTime comes back from boto3 as an aware datetime
+    since = datetime.fromisoformat(date_time.replace('Z', '+00:00'))
+    cf_client = boto3.client('cloudformation', config=BOTO_CFG)
+    paginator = cf_client.get_paginator('list_stacks')
+    return [
+        [stack['StackName'], stack['StackId']]
+        for page in paginator.paginate(StackStatusFilter=['DELETE_COMPLETE'])
+        for stack in page['StackSummaries']
+        if stack['CreationTime'] >= since
     ]
-    result = subprocess.run(command, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise Exception(f"Failed to list deleted stacks: {result.stderr}")
-    
-    return json.loads(result.stdout)
-
-def get_tagged_resources():
-    client = boto3.client('resourcegroupstaggingapi')
+
+def get_tagged_resources(stack_ids=None):
+    client = boto3.client('resourcegroupstaggingapi', config=BOTO_CFG)
     paginator = client.get_paginator('get_resources')
+    tag_filter = {'Key': 'aws:cloudformation:stack-id'}
+    # With only a few deleted stacks, let the API match the stack ids instead of returning every stack-tagged resource
+    if stack_ids and len(stack_ids) <= MAX_TAG_FILTER_VALUES:
+        tag_filter['Values'] = list(stack_ids)
     response_iterator = paginator.paginate(
-        TagFilters=[
-            {
-                'Key': 'aws:cloudformation:stack-id'
-            }
-        ]
+        TagFilters=[tag_filter]
     )
 
     resources = []
@@ -31,21 +37,18 @@ def get_tagged_resources():
     return resources
 
 def find_orphaned_resources(deleted_stacks, tagged_resources):
-    deleted_stack_ids = [stack[1] for stack in deleted_stacks]
-    orphaned_resources = []
-    for resource in tagged_resources:
-        for tag in resource['Tags']:
-            if tag['Key'] == 'aws:cloudformation:stack-id' and tag['Value'] in deleted_stack_ids:
-                orphaned_resources.append(resource)
-                break
-    return orphaned_resources
+    deleted_stack_ids = {stack[1] for stack in deleted_stacks}
+    return [
+        resource for resource in tagged_resources
+        if any(tag['Key'] == 'aws:cloudformation:stack-id' and tag['Value'] in deleted_stack_ids for tag in resource['Tags'])
+    ]
 
 def main():
     date_time = "2024-05-01T00:00:00Z"  # Replace with your specific date and time
     deleted_stacks = get_deleted_stacks(date_time)
     print(f"Found {len(deleted_stacks)} deleted stacks.")
 
-    tagged_resources = get_tagged_resources()
+    tagged_resources = get_tagged_resources({stack[1] for stack in deleted_stacks})
     print(f"Found {len(tagged_resources)} tagged resources.")
 
     orphaned_resources = find_orphaned_resources(deleted_stacks, tagged_resources)
@@ -2,11 +2,29 @@ import boto3
 import logging
 import argparse
 import re
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+
+# Client config: room in the connection pool for concurrent calls, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=50, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
+# Every stack status except DELETE_COMPLETE, so list_stacks skips deleted stacks server-side
+ACTIVE_STACK_STATUSES = [
+    'CREATE_IN_PROGRESS', 'CREATE_FAILED', 'CREATE_COMPLETE',
+    'ROLLBACK_IN_PROGRESS', 'ROLLBACK_FAILED', 'ROLLBACK_COMPLETE',
+    'DELETE_IN_PROGRESS', 'DELETE_FAILED',
+    'UPDATE_IN_PROGRESS', 'UPDATE_COMPLETE_CLEANUP_IN_PROGRESS', 'UPDATE_COMPLETE', 'UPDATE_FAILED',
+    'UPDATE_ROLLBACK_IN_PROGRESS', 'UPDATE_ROLLBACK_FAILED', 'UPDATE_ROLLBACK_COMPLETE_CLEANUP_IN_PROGRESS', 'UPDATE_ROLLBACK_COMPLETE',
+    'REVIEW_IN_PROGRESS',
+    'IMPORT_IN_PROGRESS', 'IMPORT_COMPLETE', 'IMPORT_ROLLBACK_IN_PROGRESS', 'IMPORT_ROLLBACK_FAILED', 'IMPORT_ROLLBACK_COMPLETE',
+]
 
 def setup_logger(log_file):
     """Set up logging to file and console."""
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
+    # Keep botocore's own chatter out of the run log
+    logging.getLogger('botocore').setLevel(logging.WARNING)
 
     # Create handlers
     console_handler = logging.StreamHandler()
@@ -24,16 +42,14 @@ def setup_logger(log_file):
 def get_stacks(cf_client, pattern=None):
     """Get the list of CloudFormation stacks, optionally filtering by a pattern."""
     stacks = []
-    paginator = cf_client.get_paginator('describe_stacks')
+    paginator = cf_client.get_paginator('list_stacks')
+    # Compile the pattern once, case-insensitive, instead of on every stack name
+    matcher = re.compile(pattern, re.IGNORECASE).search if pattern else None
     
-    for page in paginator.paginate():
-        for stack in page['Stacks']:
-            if pattern:
-                # Use re.search with re.IGNORECASE to match the pattern with the stack name in a case-insensitive manner
-                if re.search(pattern, stack['StackName'], re.IGNORECASE):
-                    stacks.append(stack['StackName'])
-            else:
-                stacks.append(stack['StackName'])
+    # Only the names are needed, so let the paginator project them out of every page
+    for stack_name in paginator.paginate(StackStatusFilter=ACTIVE_STACK_STATUSES).search('StackSummaries[].StackName'):
+        if matcher is None or matcher(stack_name):
+            stacks.append(stack_name)
                 
     return stacks
 
@@ -61,7 +77,7 @@ def main():
     # Setup logger
     setup_logger(args.log_file)
 
-    cf_client = boto3.client('cloudformation')
+    cf_client = boto3.client('cloudformation', config=BOTO_CFG)
 
     stacks = get_stacks(cf_client, args.pattern)
 
@@ -73,19 +89,24 @@ def main():
     for stack_name in stacks:
         logging.info(f" - {stack_name}")
 
-    # Prompt the user to confirm
+    # Prompt the user to confirm; collect all answers before updating so the threads never contend on stdin
     confirm = input("Do you want to enable termination protection for all the listed stacks? (yes/no): ")
     if confirm.lower() == 'yes':
-        for stack_name in stacks:
-            enable_termination_protection(cf_client, stack_name)
+        confirmed_stacks = stacks
     else:
+        confirmed_stacks = []
         for stack_name in stacks:
             confirm_each = input(f"Do you want to enable termination protection for stack {stack_name}? (yes/no): ")
             if confirm_each.lower() == 'yes':
-                enable_termination_protection(cf_client, stack_name)
+                confirmed_stacks.append(stack_name)
             else:
                 logging.info(f"Skipping termination protection for stack: {stack_name}")
 
+    # Each update is an independent API call, so run them concurrently
+    if confirmed_stacks:
+        with ThreadPoolExecutor(max_workers=min(20, len(confirmed_stacks))) as executor:
+            list(executor.map(lambda stack_name: enable_termination_protection(cf_client, stack_name), confirmed_stacks))
+
     logging.info("Completed enabling termination protection for the specified stacks.")
 
 if __name__ == "__main__":
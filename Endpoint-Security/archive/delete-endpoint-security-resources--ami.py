@@ -1,10 +1,20 @@
 import boto3
 import logging
+import logging.handlers
 from datetime import datetime, timezone
 import sys
 import argparse
 import os
 import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.config import Config
+
+# Client config: room in the connection pool for concurrent calls, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=50, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
+# AMI id as it appears in a snapshot description, e.g. "Created by CreateImage(i-...) for ami-... from vol-..."
+AMI_ID_RE = re.compile(r'ami-[0-9a-f]+')
 
 # Configure logging
 def setup_logger(log_file):
@@ -22,41 +32,71 @@ def setup_logger(log_file):
     
     # Add handlers to the logger
     logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-
-def list_amis(ec2_client, cutoff_date, until_date, pattern=None):
-    """List all AMIs owned by the account within the date range, optionally filtering by a pattern."""
+    # Buffer file writes; errors and a full buffer flush straight through
+    logger.addHandler(logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=file_handler))
+
+def describe_amis(ec2_client, ami_names=None):
+    """Return all AMIs owned by the account across every result page, optionally matching exact names server-side."""
+    describe_kwargs = {'Owners': ['self']}
+    if ami_names:
+        describe_kwargs['Filters'] = [{'Name': 'name', 'Values': list(ami_names)}]
+    images = []
+    for page in ec2_client.get_paginator('describe_images').paginate(**describe_kwargs):
+        images.extend(page['Images'])
+    return images
+
+def parse_creation_date(creation_date_str):
+    """Parse an EC2 CreationDate such as 2024-05-01T12:00:00.000Z into an aware UTC datetime."""
+    # fromisoformat is several times cheaper than strptime; older Pythons don't accept the Z suffix
+    return datetime.fromisoformat(creation_date_str.replace('Z', '+00:00'))
+
+def list_amis(images, cutoff_date, until_date, pattern=None):
+    """List the AMIs within the date range, optionally filtering by a pattern."""
     amis_to_delete = []
+    matcher = re.compile(pattern, re.IGNORECASE).search if pattern else None
     
-    response = ec2_client.describe_images(Owners=['self'])
-    
-    for image in response['Images']:
-        creation_date_str = image['CreationDate']
-        creation_date = datetime.strptime(creation_date_str, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+    for image in images:
+        # Match the name before paying for the date parse
         ami_name = image.get('Name', '')
+        if matcher and not matcher(ami_name):
+            continue
+        creation_date_str = image['CreationDate']
+        creation_date = parse_creation_date(creation_date_str)
         logging.debug(f"Checking AMI: {ami_name} with Creation Date: {creation_date}")
         if (not cutoff_date or cutoff_date <= creation_date) and (not until_date or creation_date <= until_date):
-            if pattern is None or re.search(pattern, ami_name, re.IGNORECASE):
-                amis_to_delete.append({
-                    'ImageId': image['ImageId'],
-                    'Name': ami_name,
-                    'CreationDate': creation_date_str
-                })
-    
+            amis_to_delete.append({
+                'ImageId': image['ImageId'],
+                'Name': ami_name,
+                'CreationDate': creation_date_str
+            })
+
     return amis_to_delete
 
-def delete_ami(ec2_client, image_id):
+def delete_ami_snapshot(ec2_client, snapshot_id, image_id):
+    """Delete a snapshot that backed the specified AMI."""
+    ec2_client.delete_snapshot(SnapshotId=snapshot_id)
+    logging.info(f"Deleted snapshot: {snapshot_id} for AMI: {image_id}")
+
+def index_snapshots_by_ami(ec2_client):
+    """Map AMI ids to the ids of the account's snapshots whose description references them."""
+    snapshots_by_ami = defaultdict(list)
+    for page in ec2_client.get_paginator('describe_snapshots').paginate(OwnerIds=['self']):
+        for snapshot in page['Snapshots']:
+            for image_id in AMI_ID_RE.findall(snapshot.get('Description', '')):
+                snapshots_by_ami[image_id].append(snapshot['SnapshotId'])
+    return snapshots_by_ami
+
+def delete_ami(ec2_client, image_id, snapshot_ids):
     """Delete the specified AMI and its associated snapshots."""
     try:
         # Deregister the AMI
         ec2_client.deregister_image(ImageId=image_id)
         logging.info(f"Deregistered AMI: {image_id}")
         
-        # Delete associated snapshots
-        snapshots = ec2_client.describe_snapshots(Filters=[{'Name': 'description', 'Values': [f'*{image_id}*']}])
-        for snapshot in snapshots['Snapshots']:
-            ec2_client.delete_snapshot(SnapshotId=snapshot['SnapshotId'])
-            logging.info(f"Deleted snapshot: {snapshot['SnapshotId']} for AMI: {image_id}")
+        # Delete associated snapshots; they are independent of each other, so delete them concurrently
+        if snapshot_ids:
+            with ThreadPoolExecutor(max_workers=min(8, len(snapshot_ids))) as executor:
+                list(executor.map(lambda snapshot_id: delete_ami_snapshot(ec2_client, snapshot_id, image_id), snapshot_ids))
     except ec2_client.exceptions.ClientError as e:
         logging.error(f"Error deleting AMI {image_id}: {e}")
 
@@ -95,37 +135,42 @@ def main():
     # Setup logger
     setup_logger(log_file)
 
-    ec2_client = boto3.client('ec2')
+    ec2_client = boto3.client('ec2', config=BOTO_CFG)
 
     amis_to_delete = []
+    seen_image_ids = set()  # AMIs already queued, so one matching both criteria is listed once
+
+    # Describe the account's AMIs once and reuse the inventory for both filters below;
+    # when only names are given, EC2 matches them server-side
+    if cutoff_date or args.pattern:
+        images = describe_amis(ec2_client)
+    else:
+        images = describe_amis(ec2_client, args.ami_names)
 
     # List AMIs based on date range and pattern
     if cutoff_date or args.pattern:
         logging.info(f"Listing AMIs owned by the account between {cutoff_date} and {until_date} with pattern {args.pattern}...")
-        amis_to_delete.extend(list_amis(ec2_client, cutoff_date, until_date, pattern=args.pattern))
+        for ami in list_amis(images, cutoff_date, until_date, pattern=args.pattern):
+            seen_image_ids.add(ami['ImageId'])
+            amis_to_delete.append(ami)
     
     # List AMIs based on specific names
     if args.ami_names:
-        ami_names = args.ami_names
-        logging.info(f"Listing AMIs with specific names: {ami_names}")
-        response = ec2_client.describe_images(Owners=['self'])
-        for image in response['Images']:
-            if image.get('Name') in ami_names:
+        ami_names = set(args.ami_names)
+        logging.info(f"Listing AMIs with specific names: {args.ami_names}")
+        for image in images:
+            if image.get('Name') in ami_names and image['ImageId'] not in seen_image_ids:
+                seen_image_ids.add(image['ImageId'])
                 amis_to_delete.append({
                     'ImageId': image['ImageId'],
                     'Name': image.get('Name', 'N/A'),
                     'CreationDate': image['CreationDate']
                 })
 
-    # Remove duplicates
-    amis_to_delete = list({ami['ImageId']: ami for ami in amis_to_delete}.values())
-
     # Summary of AMIs to delete
     logging.info(f"Found {len(amis_to_delete)} AMIs matching the criteria:")
     if amis_to_delete:
-        logging.info("AMIs to be deleted:")
-        for ami in amis_to_delete:
-            logging.info(f" - {ami['ImageId']} (Name: {ami['Name']}, CreationDate: {ami['CreationDate']})")
+        logging.info("AMIs to be deleted:\n" + "\n".join(f" - {ami['ImageId']} (Name: {ami['Name']}, CreationDate: {ami['CreationDate']})" for ami in amis_to_delete))
         
         # Prompt to delete all AMIs
         if not args.force:
@@ -138,21 +183,36 @@ def main():
         else:
             delete_all = True
 
-    success = True  # Track the success of AMI deletions
+    # Collect confirmations up front so the worker threads never contend on stdin
+    confirmed_amis = []
     for ami in amis_to_delete:
-        try:
-            if delete_all:
-                delete_ami(ec2_client, ami['ImageId'])
+        if delete_all:
+            confirmed_amis.append(ami)
+        else:
+            confirm_each = input(f"Do you want to delete the AMI {ami['ImageId']} (Name: {ami['Name']})? (yes/no): ")
+            logging.info(f"User prompt response for {ami['ImageId']}: {confirm_each}")
+            if confirm_each.lower() == 'yes':
+                confirmed_amis.append(ami)
             else:
-                confirm_each = input(f"Do you want to delete the AMI {ami['ImageId']} (Name: {ami['Name']})? (yes/no): ")
-                logging.info(f"User prompt response for {ami['ImageId']}: {confirm_each}")
-                if confirm_each.lower() == 'yes':
-                    delete_ami(ec2_client, ami['ImageId'])
-                else:
-                    logging.info(f"Skipping deletion of AMI: {ami['ImageId']}")
-        except Exception as e:
-            logging.error(f"Error during deletion of AMI {ami['ImageId']}: {e}")
-            success = False
+                logging.info(f"Skipping deletion of AMI: {ami['ImageId']}")
+
+    success = True  # Track the success of AMI deletions
+    if confirmed_amis:
+        # Look up every snapshot once rather than running a wildcard describe_snapshots per AMI
+        snapshots_by_ami = index_snapshots_by_ami(ec2_client)
+        with ThreadPoolExecutor(max_workers=min(16, len(confirmed_amis))) as executor:
+            futures = {executor.submit(delete_ami, ec2_client, ami['ImageId'], snapshots_by_ami.get(ami['ImageId'], [])): ami for ami in confirmed_amis}
+            for future in as_completed(futures):
+                ami = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error during deletion of AMI {ami['ImageId']}: {e}")
+                    success = False
+
+    # Flush the buffered log records before the log file is renamed
+    for handler in logging.getLogger().handlers:
+        handler.flush()
 
     # Rename the log file if any AMI failed to delete; assign exit_code value for later call
     if not success:
@@ -1,53 +1,92 @@
-import boto3
 import logging
 from datetime import datetime, timezone
 import sys
-import argparse
-import os
-import re
-
-# Configure logging
-def setup_logger(log_file):
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Create handlers
-    console_handler = logging.StreamHandler()
-    file_handler = logging.FileHandler(log_file)
-    
-    # Create formatters and add them to the handlers
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
-    
-    # Add handlers to the logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-
-def list_snapshots(ec2_client, cutoff_date, until_date, pattern=None):
-    """List all snapshots optionally filtering by a pattern and creation date range."""
-    snapshots_to_delete = []
-    
-    response = ec2_client.describe_snapshots(OwnerIds=['self'])
+import json
+from concurrent.futures import ThreadPoolExecutor
+import endpoint_security_common as common
+
+# Snapshot ids sent per DescribeSnapshots call when describing explicit ids
+SNAPSHOT_IDS_PER_CALL = 200
+
+# Largest page DescribeSnapshots returns when listing
+SNAPSHOTS_PER_PAGE = 1000
+
+def iter_snapshots(ec2_client, snapshot_names=None):
+    """Yield the snapshots owned by the account page by page, optionally matching exact Name tags server-side."""
+    describe_kwargs = {'OwnerIds': ['self']}
+    if snapshot_names:
+        describe_kwargs['Filters'] = [{'Name': 'tag:Name', 'Values': list(snapshot_names)}]
+    # Ask for the largest page (1000) and follow NextToken by hand: a small account is done after the
+    # first call, and a large one skips the paginator's per-page bookkeeping
+    response = ec2_client.describe_snapshots(**describe_kwargs, MaxResults=SNAPSHOTS_PER_PAGE)
+    yield from response['Snapshots']
+    while response.get('NextToken'):
+        response = ec2_client.describe_snapshots(**describe_kwargs, MaxResults=SNAPSHOTS_PER_PAGE, NextToken=response['NextToken'])
+        yield from response['Snapshots']
+
+def describe_snapshots(ec2_client, snapshot_names=None):
+    """Return the snapshots owned by the account, optionally matching exact Name tags server-side."""
+    return list(iter_snapshots(ec2_client, snapshot_names))
+
+def describe_snapshots_cached(ec2_client, snapshot_names=None):
+    """Return describe_snapshots' result, reusing a recent on-disk copy for the same account, region and names."""
+    account_id = common.create_client('sts').get_caller_identity()['Account']
+    cache_key = json.dumps(['describe_snapshots', account_id, ec2_client.meta.region_name, sorted(snapshot_names or [])])
+
+    def load():
+        return [dict(snapshot, StartTime=snapshot['StartTime'].isoformat()) for snapshot in describe_snapshots(ec2_client, snapshot_names)]
+
+    return [dict(snapshot, StartTime=datetime.fromisoformat(snapshot['StartTime'])) for snapshot in common.cached(cache_key, load)]
+
+def describe_snapshots_by_id(ec2_client, snapshot_ids, max_concurrency):
+    """Describe only the given snapshots, in parallel batches; return the snapshots found and whether every batch succeeded."""
+    def describe_batch(batch):
+        """Return the batch's snapshots that were found and whether every id could be described."""
+        try:
+            return ec2_client.describe_snapshots(SnapshotIds=batch)['Snapshots'], True
+        except ec2_client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] != 'InvalidSnapshot.NotFound':
+                logging.error(f"Error describing snapshots {batch}: {e}")
+                return [], False
+            if len(batch) == 1:
+                # An id that no longer exists has nothing left to delete
+                logging.warning(f"Snapshot {batch[0]} not found, nothing to delete")
+                return [], True
+        # One unknown id fails the whole call, so describe the batch's ids one by one to keep the others
+        results = [describe_batch([snapshot_id]) for snapshot_id in batch]
+        return [snapshot for found, _ in results for snapshot in found], all(ok for _, ok in results)
+
+    batches = common.chunked(snapshot_ids, SNAPSHOT_IDS_PER_CALL)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(batches)))) as executor:
+        results = list(executor.map(describe_batch, batches))
+    snapshots = [snapshot for found, _ in results for snapshot in found]
+    return snapshots, all(ok for _, ok in results)
+
+def iter_matching_snapshots(snapshots, cutoff_date, until_date, pattern=None, glob=False):
+    """Yield the snapshots within the date range, optionally filtering by a pattern."""
+    matcher = common.compile_name_matcher(pattern, glob)
+    # Resolve open-ended bounds once so each snapshot needs a single chained comparison
+    lower = cutoff_date or datetime.min.replace(tzinfo=timezone.utc)
+    upper = until_date or datetime.max.replace(tzinfo=timezone.utc)
     
-    for snapshot in response['Snapshots']:
-        snapshot_name = ''
-        for tag in snapshot.get('Tags', []):
-            if tag['Key'] == 'Name':
-                snapshot_name = tag['Value']
-        
-        creation_time_str = snapshot['StartTime'].strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    for snapshot in snapshots:
+        # The date check is the cheapest, so only build the tag dict for snapshots in range
         creation_time = snapshot['StartTime']
-        logging.debug(f"Checking Snapshot: {snapshot_name} with Creation Time: {creation_time}")
-        if (not cutoff_date or cutoff_date <= creation_time) and (not until_date or creation_time <= until_date):
-            if pattern is None or re.search(pattern, snapshot_name, re.IGNORECASE):
-                snapshots_to_delete.append({
+        if lower <= creation_time <= upper:
+            tags = {tag['Key']: tag['Value'] for tag in snapshot.get('Tags') or ()}
+            snapshot_name = tags.get('Name', '')
+            logging.debug(f"Checking Snapshot: {snapshot_name} with Creation Time: {creation_time}")
+            if matcher is None or matcher(snapshot_name):
+                yield {
                     'SnapshotId': snapshot['SnapshotId'],
                     'Name': snapshot_name,
-                    'CreationTime': creation_time_str
-                })
-    
-    return snapshots_to_delete
+                    # Kept as a datetime; it is only formatted when logged
+                    'CreationTime': creation_time
+                }
+
+def list_snapshots(snapshots, cutoff_date, until_date, pattern=None, glob=False):
+    """List all snapshots optionally filtering by a pattern and creation date range."""
+    return list(iter_matching_snapshots(snapshots, cutoff_date, until_date, pattern, glob))
 
 def delete_snapshot(ec2_client, snapshot_id):
     """Delete the specified snapshot."""
@@ -55,118 +94,105 @@ def delete_snapshot(ec2_client, snapshot_id):
         ec2_client.delete_snapshot(SnapshotId=snapshot_id)
         logging.info(f"Deleted Snapshot: {snapshot_id}")
     except ec2_client.exceptions.ClientError as e:
-        logging.error(f"Error deleting Snapshot {snapshot_id}: {e}")
+        # An id that no longer exists has nothing left to delete
+        if e.response['Error']['Code'] == 'InvalidSnapshot.NotFound':
+            logging.warning(f"Snapshot {snapshot_id} not found, nothing to delete")
+        else:
+            logging.error(f"Error deleting Snapshot {snapshot_id}: {e}")
 
 def main():
-    parser = argparse.ArgumentParser(description="Delete AWS EBS volume snapshots matching specific criteria.")
-    parser.add_argument("--cutoff-date", help="Cutoff date-time in format YYYY-MM-DDTHH:MM:SSZ (UTC)")
-    parser.add_argument("--until-date", default=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                        help="Until date-time in format YYYY-MM-DDTHH:MM:SSZ (UTC), default is now")
-    parser.add_argument("--pattern", "-p", help="Pattern to filter snapshot names for deletion.")
-    parser.add_argument("snapshot_names", nargs='*', help="List of specific snapshot names to delete.")
-    parser.add_argument("--force", "-f", action="store_true", help="Force deletion without confirmation")
-    parser.add_argument("--log-file", "-l", help="Log file to store the output")
-    parser.add_argument("--log-dir", "-d", help="Directory to store the log file", default="./.script-logs")
+    parser = common.build_argparser("Delete AWS EBS volume snapshots matching specific criteria.", "snapshot", "snapshot_names")
+    parser.add_argument("--snapshot-ids", "-i", help="Comma-separated list of specific snapshot ids to delete")
+    parser.add_argument("--cache", action="store_true", help="Reuse a snapshot listing from the last 10 minutes instead of describing the snapshots afresh")
     args = parser.parse_args()
+    snapshot_ids = [snapshot_id.strip() for snapshot_id in args.snapshot_ids.split(',') if snapshot_id.strip()] if args.snapshot_ids else []
 
     # Check that at least one criterion is provided
-    if not args.cutoff_date and not args.pattern and not args.snapshot_names:
-        logging.error("You must provide at least one of --cutoff-date, --pattern, or snapshot_names.")
+    if not args.cutoff_date and not args.pattern and not args.snapshot_names and not snapshot_ids:
+        logging.error("You must provide at least one of --cutoff-date, --pattern, --snapshot-ids, or snapshot_names.")
         parser.print_help()
         sys.exit(1)
 
-    # Validate date formats if provided
-    try:
-        cutoff_date = datetime.strptime(args.cutoff_date, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc) if args.cutoff_date else None
-        until_date = datetime.strptime(args.until_date, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
-    except ValueError as e:
-        logging.error(f"Invalid date format: {e}")
-        sys.exit(1)
-
-    # Define the default log file path
-    log_dir = args.log_dir
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    log_file = args.log_file or os.path.join(log_dir, f"script_run_{datetime.now().strftime('%Y_%m_%d___%H%M%S')}.log")
-
-    # Setup logger
-    setup_logger(log_file)
+    cutoff_date, until_date = common.parse_dates(args)
+    log_file = common.init_log_file(args)
 
-    ec2_client = boto3.client('ec2')
+    ec2_client = common.create_client('ec2', args.max_concurrency)
 
     snapshots_to_delete = []
+    seen_snapshot_ids = set()  # Snapshots already queued, so one matching both criteria is listed once
+
+    success = True  # Track the success of describing and deleting snapshots
+
+    # With --force and only a date range/pattern there is nothing to confirm, so delete each matching
+    # snapshot as its page arrives instead of holding the whole inventory first
+    if args.force and (cutoff_date or args.pattern) and not args.snapshot_names and not snapshot_ids:
+        logging.info(f"Deleting snapshots created between {cutoff_date} and {until_date} with pattern {args.pattern} as they are listed...")
+        matching_snapshots = iter_matching_snapshots(iter_snapshots(ec2_client), cutoff_date, until_date, pattern=args.pattern, glob=args.glob)
+        success = common.delete_streaming(matching_snapshots, lambda snapshot_id: delete_snapshot(ec2_client, snapshot_id), 'SnapshotId',
+                                          "snapshot", args.max_concurrency)
+        common.finalize_log(log_file, success)
+
+    # Describe the account's snapshots once and reuse the inventory for both filters below;
+    # when only names are given, EC2 matches the Name tag server-side. Live state is listed unless --cache is given
+    describe = describe_snapshots_cached if args.cache else describe_snapshots
+    if cutoff_date or args.pattern:
+        snapshots = describe(ec2_client)
+    elif args.snapshot_names:
+        snapshots = describe(ec2_client, args.snapshot_names)
+    else:
+        snapshots = []
 
     # List snapshots based on date range and pattern
     if cutoff_date or args.pattern:
         logging.info(f"Listing snapshots created between {cutoff_date} and {until_date} with pattern {args.pattern}...")
-        snapshots_to_delete.extend(list_snapshots(ec2_client, cutoff_date, until_date, pattern=args.pattern))
+        for snapshot in list_snapshots(snapshots, cutoff_date, until_date, pattern=args.pattern, glob=args.glob):
+            seen_snapshot_ids.add(snapshot['SnapshotId'])
+            snapshots_to_delete.append(snapshot)
     
     # List snapshots based on specific names
     if args.snapshot_names:
-        snapshot_names = args.snapshot_names
-        logging.info(f"Listing snapshots with specific names: {snapshot_names}")
-        response = ec2_client.describe_snapshots(OwnerIds=['self'])
-        for snapshot in response['Snapshots']:
-            snapshot_name = ''
-            for tag in snapshot.get('Tags', []):
-                if tag['Key'] == 'Name' and tag['Value'] in snapshot_names:
-                    snapshot_name = tag['Value']
-                    snapshots_to_delete.append({
-                        'SnapshotId': snapshot['SnapshotId'],
-                        'Name': snapshot_name,
-                        'CreationTime': snapshot['StartTime'].strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-                    })
-
-    # Remove duplicates
-    snapshots_to_delete = list({snapshot['SnapshotId']: snapshot for snapshot in snapshots_to_delete}.values())
-
-    # Summary of snapshots to delete
-    logging.info(f"Found {len(snapshots_to_delete)} snapshots matching the criteria:")
-    if snapshots_to_delete:
-        logging.info("Snapshots to be deleted:")
-        for snapshot in snapshots_to_delete:
-            logging.info(f" - {snapshot['SnapshotId']} (Name: {snapshot['Name']}, CreationTime: {snapshot['CreationTime']})")
-        
-        # Prompt to delete all snapshots
-        if not args.force:
-            confirm_all = input("Do you want to delete them all? (yes/no): ")
-            logging.info(f"User prompt response: {confirm_all}")
-            if confirm_all.lower() == 'yes':
-                delete_all = True
-            else:
-                delete_all = False
-        else:
-            delete_all = True
+        snapshot_names = set(args.snapshot_names)
+        logging.info(f"Listing snapshots with specific names: {args.snapshot_names}")
+        for snapshot in snapshots:
+            tags = {tag['Key']: tag['Value'] for tag in snapshot.get('Tags') or ()}
+            snapshot_name = tags.get('Name')
+            if snapshot_name in snapshot_names and snapshot['SnapshotId'] not in seen_snapshot_ids:
+                seen_snapshot_ids.add(snapshot['SnapshotId'])
+                snapshots_to_delete.append({
+                    'SnapshotId': snapshot['SnapshotId'],
+                    'Name': snapshot_name,
+                    'CreationTime': snapshot['StartTime']
+                })
 
-    success = True  # Track the success of snapshot deletions
-    for snapshot in snapshots_to_delete:
-        try:
-            if delete_all:
-                delete_snapshot(ec2_client, snapshot['SnapshotId'])
-            else:
-                confirm_each = input(f"Do you want to delete the snapshot {snapshot['SnapshotId']} (Name: {snapshot['Name']})? (yes/no): ")
-                logging.info(f"User prompt response for {snapshot['SnapshotId']}: {confirm_each}")
-                if confirm_each.lower() == 'yes':
-                    delete_snapshot(ec2_client, snapshot['SnapshotId'])
-                else:
-                    logging.info(f"Skipping deletion of snapshot: {snapshot['SnapshotId']}")
-        except Exception as e:
-            logging.error(f"Error during deletion of snapshot {snapshot['SnapshotId']}: {e}")
-            success = False
-
-    # Rename the log file if any snapshot failed to delete; assign exit_code value for later call
-    if not success:
-        error_log_file = log_file.replace('.log', '__errorred.log')
-        os.rename(log_file, error_log_file)
-        log_file = error_log_file
-        exit_code = 1
-    else:
-        exit_code = 0
+    # With --force and nothing but ids, describing first buys nothing: DeleteSnapshot reports unknown ids itself
+    if args.force and snapshot_ids and not (cutoff_date or args.pattern or args.snapshot_names):
+        logging.info("Skipping describe; deleting snapshots by id")
+        for snapshot_id in snapshot_ids:
+            if snapshot_id not in seen_snapshot_ids:
+                seen_snapshot_ids.add(snapshot_id)
+                snapshots_to_delete.append({'SnapshotId': snapshot_id, 'Name': 'N/A', 'CreationTime': 'N/A'})
+
+    # List snapshots based on specific ids; only the requested snapshots are described
+    elif snapshot_ids:
+        logging.info(f"Listing snapshots with specific ids: {snapshot_ids}")
+        snapshots_by_id, described_all = describe_snapshots_by_id(ec2_client, snapshot_ids, args.max_concurrency)
+        success = success and described_all
+        for snapshot in snapshots_by_id:
+            if snapshot['SnapshotId'] not in seen_snapshot_ids:
+                seen_snapshot_ids.add(snapshot['SnapshotId'])
+                tags = {tag['Key']: tag['Value'] for tag in snapshot.get('Tags') or ()}
+                snapshots_to_delete.append({
+                    'SnapshotId': snapshot['SnapshotId'],
+                    'Name': tags.get('Name', ''),
+                    'CreationTime': snapshot['StartTime']
+                })
 
-    # Print out the log file location at the end
-    print(f"THE LOG FILE LOCATION IS: {log_file}")
-    
-    sys.exit(exit_code)
+    deleted_all = common.confirm_and_delete(snapshots_to_delete, lambda snapshot_id: delete_snapshot(ec2_client, snapshot_id), 'SnapshotId',
+                                            "snapshot", args.force, args.max_concurrency)
+    success = success and deleted_all
+
+    # Rename the log file if any snapshot failed to delete and exit accordingly
+    common.finalize_log(log_file, success)
 
 if __name__ == "__main__":
     main()
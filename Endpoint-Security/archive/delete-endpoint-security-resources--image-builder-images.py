@@ -1,42 +1,52 @@
-import boto3
 import logging
-from datetime import datetime, timezone
 import sys
-import argparse
-import os
-import re
-
-# Configure logging
-def setup_logger(log_file):
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Create handlers
-    console_handler = logging.StreamHandler()
-    file_handler = logging.FileHandler(log_file)
-    
-    # Create formatters and add them to the handlers
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
-    
-    # Add handlers to the logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+from concurrent.futures import ThreadPoolExecutor
+import endpoint_security_common as common
+
+# Image Builder list filters accept at most 10 values each
+IMAGEBUILDER_FILTER_MAX_VALUES = 10
+
+def fetch_images(imagebuilder_client, names=None):
+    """Return the account's images, optionally matching exact names server-side."""
+    # Page through every result; a single call only returns the first page
+    paginator = imagebuilder_client.get_paginator('list_images')
+    if not names:
+        filter_sets = [None]
+    else:
+        # A name filter takes a limited number of values, so send the names in batches
+        filter_sets = [[{'name': 'name', 'values': names[i:i + IMAGEBUILDER_FILTER_MAX_VALUES]}]
+                       for i in range(0, len(names), IMAGEBUILDER_FILTER_MAX_VALUES)]
+    images = []
+    for filters in filter_sets:
+        for page in paginator.paginate(**({'filters': filters} if filters else {})):
+            images.extend(page['imageVersionList'])
+    return images
+
+def get_images_by_arn(imagebuilder_client, image_arns, max_concurrency):
+    """Get only the given images, in parallel; return the images found and whether every lookup succeeded."""
+    def get_image(image_arn):
+        try:
+            return imagebuilder_client.get_image(imageBuildVersionArn=image_arn)['image']
+        except imagebuilder_client.exceptions.ClientError as e:
+            logging.error(f"Error getting Image {image_arn}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(image_arns)))) as executor:
+        results = list(executor.map(get_image, image_arns))
+    return [image for image in results if image], all(image is not None for image in results)
 
-def list_images(imagebuilder_client, cutoff_date, until_date, pattern=None):
+def list_images(images, cutoff_date, until_date, pattern=None, glob=False):
     """List all images optionally filtering by a pattern and creation date range."""
     images_to_delete = []
+    matcher = common.compile_name_matcher(pattern, glob)
     
-    response = imagebuilder_client.list_images()
-    
-    for image in response['imageVersionList']:
+    for image in images:
         image_name = image.get('name', '')
         creation_time_str = image['dateCreated']
-        creation_time = datetime.strptime(creation_time_str, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+        creation_time = common.parse_timestamp(creation_time_str)
         logging.debug(f"Checking Image: {image_name} with Creation Time: {creation_time}")
         if (not cutoff_date or cutoff_date <= creation_time) and (not until_date or creation_time <= until_date):
-            if pattern is None or re.search(pattern, image_name, re.IGNORECASE):
+            if matcher is None or matcher(image_name):
                 images_to_delete.append({
                     'Arn': image['arn'],
                     'Name': image_name,
@@ -54,112 +64,76 @@ def delete_image(imagebuilder_client, image_arn):
         logging.error(f"Error deleting Image {image_arn}: {e}")
 
 def main():
-    parser = argparse.ArgumentParser(description="Delete AWS EC2 Image Builder images matching specific criteria.")
-    parser.add_argument("--cutoff-date", help="Cutoff date-time in format YYYY-MM-DDTHH:MM:SSZ (UTC)")
-    parser.add_argument("--until-date", default=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                        help="Until date-time in format YYYY-MM-DDTHH:MM:SSZ (UTC), default is now")
-    parser.add_argument("--pattern", "-p", help="Pattern to filter image names for deletion.")
-    parser.add_argument("image_names", nargs='*', help="List of specific image names to delete.")
-    parser.add_argument("--force", "-f", action="store_true", help="Force deletion without confirmation")
-    parser.add_argument("--log-file", "-l", help="Log file to store the output")
-    parser.add_argument("--log-dir", "-d", help="Directory to store the log file", default="./.script-logs")
+    parser = common.build_argparser("Delete AWS EC2 Image Builder images matching specific criteria.", "image", "image_names")
+    parser.add_argument("--image-arns", "-a", help="Comma-separated list of specific image build version ARNs to delete")
     args = parser.parse_args()
+    image_arns = [image_arn.strip() for image_arn in args.image_arns.split(',') if image_arn.strip()] if args.image_arns else []
 
     # Check that at least one criterion is provided
-    if not args.cutoff_date and not args.pattern and not args.image_names:
-        logging.error("You must provide at least one of --cutoff-date, --pattern, or image_names.")
+    if not args.cutoff_date and not args.pattern and not args.image_names and not image_arns:
+        logging.error("You must provide at least one of --cutoff-date, --pattern, --image-arns, or image_names.")
         parser.print_help()
         sys.exit(1)
 
-    # Validate date formats if provided
-    try:
-        cutoff_date = datetime.strptime(args.cutoff_date, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc) if args.cutoff_date else None
-        until_date = datetime.strptime(args.until_date, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
-    except ValueError as e:
-        logging.error(f"Invalid date format: {e}")
-        sys.exit(1)
+    cutoff_date, until_date = common.parse_dates(args)
+    log_file = common.init_log_file(args)
 
-    # Define the default log file path
-    log_dir = args.log_dir
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    log_file = args.log_file or os.path.join(log_dir, f"script_run_{datetime.now().strftime('%Y_%m_%d___%H%M%S')}.log")
+    imagebuilder_client = common.create_client('imagebuilder', args.max_concurrency)
 
-    # Setup logger
-    setup_logger(log_file)
+    images_to_delete = []
+    seen_image_arns = set()  # Images already queued, so one matching both criteria is listed once
 
-    imagebuilder_client = boto3.client('imagebuilder')
+    success = True  # Track the success of looking up and deleting images
 
-    images_to_delete = []
+    # Fetch the images once and reuse them for both filters below;
+    # when only names are given, Image Builder matches them server-side
+    if cutoff_date or args.pattern:
+        images = fetch_images(imagebuilder_client)
+    elif args.image_names:
+        images = fetch_images(imagebuilder_client, args.image_names)
+    else:
+        images = []
 
     # List images based on date range and pattern
     if cutoff_date or args.pattern:
         logging.info(f"Listing images created between {cutoff_date} and {until_date} with pattern {args.pattern}...")
-        images_to_delete.extend(list_images(imagebuilder_client, cutoff_date, until_date, pattern=args.pattern))
+        for image in list_images(images, cutoff_date, until_date, pattern=args.pattern, glob=args.glob):
+            seen_image_arns.add(image['Arn'])
+            images_to_delete.append(image)
     
     # List images based on specific names
     if args.image_names:
-        image_names = args.image_names
-        logging.info(f"Listing images with specific names: {image_names}")
-        response = imagebuilder_client.list_images()
-        for image in response['imageVersionList']:
-            if image.get('name') in image_names:
+        image_names = set(args.image_names)
+        logging.info(f"Listing images with specific names: {args.image_names}")
+        for image in images:
+            if image.get('name') in image_names and image['arn'] not in seen_image_arns:
+                seen_image_arns.add(image['arn'])
                 images_to_delete.append({
                     'Arn': image['arn'],
                     'Name': image.get('name', 'N/A'),
                     'CreationTime': image['dateCreated']
                 })
 
-    # Remove duplicates
-    images_to_delete = list({image['Arn']: image for image in images_to_delete}.values())
-
-    # Summary of images to delete
-    logging.info(f"Found {len(images_to_delete)} images matching the criteria:")
-    if images_to_delete:
-        logging.info("Images to be deleted:")
-        for image in images_to_delete:
-            logging.info(f" - {image['Arn']} (Name: {image['Name']}, CreationTime: {image['CreationTime']})")
-        
-        # Prompt to delete all images
-        if not args.force:
-            confirm_all = input("Do you want to delete them all? (yes/no): ")
-            logging.info(f"User prompt response: {confirm_all}")
-            if confirm_all.lower() == 'yes':
-                delete_all = True
-            else:
-                delete_all = False
-        else:
-            delete_all = True
-
-    success = True  # Track the success of image deletions
-    for image in images_to_delete:
-        try:
-            if delete_all:
-                delete_image(imagebuilder_client, image['Arn'])
-            else:
-                confirm_each = input(f"Do you want to delete the image {image['Arn']} (Name: {image['Name']})? (yes/no): ")
-                logging.info(f"User prompt response for {image['Arn']}: {confirm_each}")
-                if confirm_each.lower() == 'yes':
-                    delete_image(imagebuilder_client, image['Arn'])
-                else:
-                    logging.info(f"Skipping deletion of image: {image['Arn']}")
-        except Exception as e:
-            logging.error(f"Error during deletion of image {image['Arn']}: {e}")
-            success = False
-
-    # Rename the log file if any image failed to delete; assign exit_code value for later call
-    if not success:
-        error_log_file = log_file.replace('.log', '__errorred.log')
-        os.rename(log_file, error_log_file)
-        log_file = error_log_file
-        exit_code = 1
-    else:
-        exit_code = 0
+    # List images based on specific ARNs; only the requested images are looked up
+    if image_arns:
+        logging.info(f"Listing images with specific ARNs: {image_arns}")
+        images_by_arn, found_all = get_images_by_arn(imagebuilder_client, image_arns, args.max_concurrency)
+        success = success and found_all
+        for image in images_by_arn:
+            if image['arn'] not in seen_image_arns:
+                seen_image_arns.add(image['arn'])
+                images_to_delete.append({
+                    'Arn': image['arn'],
+                    'Name': image.get('name', 'N/A'),
+                    'CreationTime': image['dateCreated']
+                })
 
-    # Print out the log file location at the end
-    print(f"THE LOG FILE LOCATION IS: {log_file}")
-    
-    sys.exit(exit_code)
+    deleted_all = common.confirm_and_delete(images_to_delete, lambda arn: delete_image(imagebuilder_client, arn), 'Arn',
+                                            "image", args.force, args.max_concurrency)
+    success = success and deleted_all
+
+    # Rename the log file if any image failed to delete and exit accordingly
+    common.finalize_log(log_file, success)
 
 if __name__ == "__main__":
     main()
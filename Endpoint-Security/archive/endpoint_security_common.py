@@ -0,0 +1,261 @@
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+import sys
+import argparse
+import os
+import time
+import json
+import hashlib
+import re
+import fnmatch
+import shlex
+import subprocess
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+# Shared setup for the delete-endpoint-security-resources--*.py archive scripts
+
+# Default number of deletions run at the same time
+DEFAULT_MAX_CONCURRENCY = min(32, 4 * (os.cpu_count() or 1))
+
+# Listing results are reused from disk for this long, so a review run followed by the real run lists only once
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'endpoint-security-cleanup')
+CACHE_TTL_SECONDS = 600
+
+# Configure logging
+def setup_logger(log_file):
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+
+    # Drop handlers from an earlier setup so records aren't written twice
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+
+    # Create handlers
+    console_handler = logging.StreamHandler()
+    # delay: the file is only created once something is logged to it
+    file_handler = logging.FileHandler(log_file, delay=True)
+
+    # Create formatters and add them to the handlers
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+    file_handler.setFormatter(formatter)
+
+    # Add handlers to the logger
+    logger.addHandler(console_handler)
+    # Buffer file writes; errors and a full buffer flush straight through
+    logger.addHandler(logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=file_handler))
+
+def create_client(service_name, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """Create a boto3 client with a connection per worker thread and adaptive retries on throttling."""
+    # Imported here so --help and argument errors don't pay for loading boto3
+    import boto3
+    from botocore.config import Config
+    # Size the pool to the workers so concurrent deletes don't queue for a connection
+    boto_cfg = Config(max_pool_connections=max(10, max_concurrency), retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+    return boto3.client(service_name, config=boto_cfg)
+
+def chunked(items, size):
+    """Split a list into consecutive batches of at most size items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def parse_timestamp(value):
+    """Parse an API timestamp such as 2024-05-01T12:00:00.000Z into an aware UTC datetime."""
+    # fromisoformat is much cheaper than strptime; Pythons before 3.11 don't accept the Z suffix
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def format_timestamp(value):
+    """Render a CreationTime for logs; datetimes are only formatted here, when actually shown."""
+    return value.isoformat(timespec='microseconds') if isinstance(value, datetime) else value
+
+def compile_name_matcher(pattern, glob=False):
+    """Return a case-insensitive search function for --pattern, or None when no pattern is given."""
+    if not pattern:
+        return None
+    # With --glob, a pattern such as test-*-snap is matched against the whole name; otherwise it is a regex search
+    if glob:
+        return re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+    return re.compile(pattern, re.IGNORECASE).search
+
+def cached(cache_key, loader, ttl=CACHE_TTL_SECONDS):
+    """Return loader()'s JSON-serialisable result, reusing a copy cached on disk under cache_key for up to ttl seconds."""
+    path = os.path.join(CACHE_DIR, hashlib.sha256(cache_key.encode()).hexdigest() + '.json')
+    try:
+        if time.time() - os.path.getmtime(path) < ttl:
+            with open(path) as cache_file:
+                logging.info(f"Using cached listing from {path}")
+                return json.load(cache_file)
+    except (OSError, ValueError):
+        pass  # No usable cache entry; load fresh below
+
+    result = loader()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as cache_file:
+            json.dump(result, cache_file, default=str)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"Could not write listing cache {path}: {e}")
+    return result
+
+def build_argparser(description, resource_label, names_dest):
+    """Build the argument parser shared by the archive scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--cutoff-date", help="Cutoff date-time in format YYYY-MM-DDTHH:MM:SSZ (UTC)")
+    parser.add_argument("--until-date", default=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        help="Until date-time in format YYYY-MM-DDTHH:MM:SSZ (UTC), default is now")
+    parser.add_argument("--pattern", "-p", help=f"Pattern to filter {resource_label} names for deletion.")
+    parser.add_argument("--glob", action="store_true", help="Treat --pattern as a shell-style glob such as 'test-*-snap', matched against the whole name")
+    parser.add_argument(names_dest, nargs='*', help=f"List of specific {resource_label} names to delete.")
+    parser.add_argument("--force", "-f", action="store_true", help="Force deletion without confirmation")
+    parser.add_argument("--log-file", "-l", help="Log file to store the output")
+    parser.add_argument("--log-dir", "-d", help="Directory to store the log file", default="./.script-logs")
+    parser.add_argument("--max-concurrency", "-c", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f"Maximum number of {resource_label}s deleted at the same time")
+    return parser
+
+def parse_dates(args):
+    """Validate and parse the cutoff and until dates; exit on an invalid format."""
+    try:
+        cutoff_date = datetime.strptime(args.cutoff_date, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc) if args.cutoff_date else None
+        until_date = datetime.strptime(args.until_date, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    except ValueError as e:
+        logging.error(f"Invalid date format: {e}")
+        sys.exit(1)
+    return cutoff_date, until_date
+
+def init_log_file(args):
+    """Create the log directory if needed, set up the logger and return the log file path."""
+    log_dir = args.log_dir
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    log_file = args.log_file or os.path.join(log_dir, f"script_run_{datetime.now().strftime('%Y_%m_%d___%H%M%S')}.log")
+    setup_logger(log_file)
+    return log_file
+
+def select_in_editor(items, key, resource_label):
+    """Let the user pick items in $VISUAL/$EDITOR in one pass; return the picked items, or None when no editor is usable."""
+    editor = os.environ.get('VISUAL') or os.environ.get('EDITOR')
+    if not editor or not sys.stdin.isatty():
+        return None
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', prefix='delete-selection-', delete=False) as selection_file:
+        selection_file.write(f"# Uncomment (remove the leading '# ') every {resource_label} to delete, then save and quit.\n")
+        selection_file.write("# Lines that stay commented out are skipped.\n")
+        for item in items:
+            selection_file.write(f"# {item[key]}  Name: {item['Name']}  CreationTime: {format_timestamp(item['CreationTime'])}\n")
+        path = selection_file.name
+    try:
+        if subprocess.call(shlex.split(editor) + [path]) != 0:
+            logging.warning(f"Editor {editor} exited with an error; falling back to per-item prompts")
+            return None
+        with open(path) as selection_file:
+            selected = {line.split()[0] for line in selection_file if line.strip() and not line.lstrip().startswith('#')}
+    finally:
+        os.remove(path)
+
+    logging.info(f"Selected {len(selected)} {resource_label}s in the editor: {sorted(selected)}")
+    return [item for item in items if item[key] in selected]
+
+def confirm_and_delete(items, delete_fn, key, resource_label, force, max_concurrency):
+    """Log the items, confirm their deletion and delete the confirmed ones concurrently; return False if any deletion failed."""
+    # Summary of items to delete
+    logging.info(f"Found {len(items)} {resource_label}s matching the criteria:")
+    if not items:
+        return True
+    logging.info(f"{resource_label.capitalize()}s to be deleted:")
+    for item in items:
+        logging.info(f" - {item[key]} (Name: {item['Name']}, CreationTime: {format_timestamp(item['CreationTime'])})")
+
+    # Prompt to delete all items
+    if not force:
+        confirm_all = input("Do you want to delete them all? (yes/no): ")
+        logging.info(f"User prompt response: {confirm_all}")
+        delete_all = confirm_all.lower() == 'yes'
+    else:
+        delete_all = True
+
+    # Collect confirmations up front so the worker threads never contend on stdin;
+    # when an editor is available the user picks everything in one pass instead of item by item
+    if delete_all:
+        confirmed_items = list(items)
+    else:
+        confirmed_items = select_in_editor(items, key, resource_label)
+    if confirmed_items is None:
+        confirmed_items = []
+        for item in items:
+            confirm_each = input(f"Do you want to delete the {resource_label} {item[key]} (Name: {item['Name']})? (yes/no): ")
+            logging.info(f"User prompt response for {item[key]}: {confirm_each}")
+            if confirm_each.lower() == 'yes':
+                confirmed_items.append(item)
+            else:
+                logging.info(f"Skipping deletion of {resource_label}: {item[key]}")
+
+    success = True  # Track the success of deletions
+    if confirmed_items:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(confirmed_items)))) as executor:
+            futures = {executor.submit(delete_fn, item[key]): item for item in confirmed_items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error during deletion of {resource_label} {item[key]}: {e}")
+                    success = False
+    return success
+
+def delete_streaming(items, delete_fn, key, resource_label, max_concurrency):
+    """Delete items as they are produced, with at most max_concurrency deletions in flight; return False if any deletion failed."""
+    success = True  # Track the success of deletions
+
+    def collect(done_futures):
+        nonlocal success
+        for future in done_futures:
+            item = in_flight.pop(future)
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Error during deletion of {resource_label} {item[key]}: {e}")
+                success = False
+
+    count = 0
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        for item in items:
+            # Wait for a free worker so the backlog never grows past the pool
+            if len(in_flight) >= max_concurrency:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            logging.info(f" - {item[key]} (Name: {item['Name']}, CreationTime: {format_timestamp(item['CreationTime'])})")
+            in_flight[executor.submit(delete_fn, item[key])] = item
+            count += 1
+        collect(list(as_completed(in_flight)))
+
+    logging.info(f"Processed {count} {resource_label}s matching the criteria")
+    return success
+
+def finalize_log(log_file, success):
+    """Rename the log file if anything failed, print its location and exit with the matching code."""
+    # Flush the buffered log records before the log file is renamed
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+    if not success:
+        # Rename only the file name itself, so a '.log' elsewhere in the path is left alone
+        log_path = Path(log_file)
+        error_log_file = str(log_path.with_name(log_path.stem + '__errorred' + log_path.suffix))
+        if log_path.exists():
+            os.replace(log_path, error_log_file)
+        log_file = error_log_file
+        exit_code = 1
+    else:
+        exit_code = 0
+
+    # Print out the log file location at the end
+    print(f"THE LOG FILE LOCATION IS: {log_file}")
+
+    sys.exit(exit_code)
@@ -1,25 +1,30 @@
 import boto3
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+
+# Client config: room in the connection pool for concurrent calls, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=50, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
 # Initialize a session using Amazon Image Builder
-client = boto3.client('imagebuilder')
+client = boto3.client('imagebuilder', config=BOTO_CFG)
 
 def list_all_images(imagebuilder_client):
     images = []
-    response = imagebuilder_client.list_images()
-    images.extend(response['imageVersionList'])
+    paginator = imagebuilder_client.get_paginator('list_images')
+    for page in paginator.paginate():
+        images.extend(page['imageVersionList'])
     return images
 
 def list_image_versions(imagebuilder_client, image_arn):
     versions = []
-    response = imagebuilder_client.list_image_build_versions(
-        imageVersionArn=image_arn
-    )
-    for image in response['imageSummaryList']:
-        versions.append(image['arn'])
+    paginator = imagebuilder_client.get_paginator('list_image_build_versions')
+    for page in paginator.paginate(imageVersionArn=image_arn):
+        for image in page['imageSummaryList']:
+            versions.append(image['arn'])
     return versions
 
 def delete_image_version(imagebuilder_client, image_arn):
@@ -32,17 +37,30 @@ def delete_image_version(imagebuilder_client, image_arn):
 
 def delete_all_image_versions(imagebuilder_client):
     images = list_all_images(imagebuilder_client)
-    for image in images:
-        image_arn = image['arn']
-        image_name = image.get('name', '')
-        logging.info(f"Processing Image: {image_name} ({image_arn})")
-        versions = list_image_versions(imagebuilder_client, image_arn)
+
+    # List the build versions of every image concurrently
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        versions_per_image = list(executor.map(lambda image: list_image_versions(imagebuilder_client, image['arn']), images))
+
+    all_versions = []
+    for image, versions in zip(images, versions_per_image):
+        logging.info(f"Image: {image.get('name', '')} ({image['arn']})")
         for version in versions:
-            response = input(f"Do you want to delete the image version {version} of {image_name}? (yes/no): ")
-            if response.lower() == 'yes':
-                delete_image_version(imagebuilder_client, version)
-            else:
-                logging.info(f"Skipping deletion of image version: {version}")
+            logging.info(f" - {version}")
+        all_versions.extend(versions)
+
+    if not all_versions:
+        logging.info("No image versions found.")
+        return
+
+    # Confirm once for the whole plan, then delete the versions concurrently
+    response = input(f"Do you want to delete all {len(all_versions)} image versions listed above? (yes/no): ")
+    if response.lower() != 'yes':
+        logging.info("Skipping deletion of image versions.")
+        return
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        list(executor.map(lambda version: delete_image_version(imagebuilder_client, version), all_versions))
 
 # Example usage
 if __name__ == "__main__":
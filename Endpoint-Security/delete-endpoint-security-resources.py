@@ -1,10 +1,38 @@
 import boto3
+from botocore.config import Config
 import logging
+import logging.handlers
+import queue
+import atexit
 from datetime import datetime, timezone
 import sys
 import argparse
 import os
 import re
+from fnmatch import fnmatchcase
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Number of deletions run at the same time
+MAX_WORKERS = 16
+
+# AMI ids referenced in a snapshot description, e.g. 'Created by CreateImage(i-...) for ami-0123abcd'
+AMI_ID_RE = re.compile(r'ami-[0-9a-f]+')
+
+# Characters that give a --pattern regex meaning beyond a literal substring
+REGEX_SPECIAL_CHARS = set('.^$*+?{}[]\\|()')
+
+# Key holding the id and the creation date of each resource type
+ID_KEY = {'ami': 'ImageId', 'pipeline': 'Arn', 'image': 'Arn', 'snapshot': 'SnapshotId'}
+DATE_KEY = {'ami': 'CreationDate', 'pipeline': 'CreationTime', 'image': 'CreationTime', 'snapshot': 'CreationTime'}
+
+# Client config: room in the connection pool for the worker threads, kept-alive connections, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=32, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
+# Function to create the clients from a single session, so credentials and config are resolved once
+def get_clients():
+    session = boto3.session.Session()
+    return session.client('ec2', config=BOTO_CFG), session.client('imagebuilder', config=BOTO_CFG)
 
 # Configure logging
 def setup_logger(log_file):
@@ -20,60 +48,98 @@ def setup_logger(log_file):
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
     
+    # Hand file records to a background listener so the deletion threads never block on file I/O; the console
+    # handler stays synchronous so the summary is always printed before the confirmation prompts
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    # Stopping the listener drains the queue, so no record is lost on any exit path
+    atexit.register(listener.stop)
+
     # Add handlers to the logger
     logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+# Function to build a case-insensitive search for --pattern; returns None when no pattern is given
+def compile_pattern(pattern):
+    if not pattern:
+        return None
+    # A pattern without regex syntax is a plain substring test: linear time, no backtracking
+    if not REGEX_SPECIAL_CHARS.intersection(pattern):
+        needle = pattern.lower()
+        return lambda name: needle in name.lower()
+    return re.compile(pattern, re.IGNORECASE).search
 
 # Function to list AMIs based on provided criteria
-def list_amis(ec2_client, cutoff_date, until_date, pattern=None):
-    amis_to_delete = []
-    response = ec2_client.describe_images(Owners=['self'])
-    for image in response['Images']:
-        creation_date_str = image['CreationDate']
-        creation_date = datetime.strptime(creation_date_str, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
-        ami_name = image.get('Name', '')
-        logging.debug(f"Checking AMI: {ami_name} with Creation Date: {creation_date}")
-        if (not cutoff_date or cutoff_date <= creation_date) and (not until_date or creation_date <= until_date):
-            if pattern is None or re.search(pattern, ami_name, re.IGNORECASE):
-                amis_to_delete.append({
+def list_amis(ec2_client, cutoff_date, until_date, pattern_search=None, names_set=frozenset(), name_glob=None):
+    describe_kwargs = {'Owners': ['self']}
+    if name_glob:
+        # EC2 applies the glob server-side; named AMIs are added to the filter values so they are still returned
+        describe_kwargs['Filters'] = [{'Name': 'name', 'Values': [name_glob, *names_set]}]
+    # Yield matches page by page instead of holding every AMI in memory
+    for page in ec2_client.get_paginator('describe_images').paginate(**describe_kwargs):
+        for image in page['Images']:
+            creation_date_str = image['CreationDate']
+            # fromisoformat is much cheaper than strptime; Pythons before 3.11 don't accept the Z suffix
+            creation_date = datetime.fromisoformat(creation_date_str.replace('Z', '+00:00'))
+            ami_name = image.get('Name', '')
+            # %-style arguments are only formatted if DEBUG is enabled, not once per listed resource
+            logging.debug("Checking AMI: %s with Creation Date: %s", ami_name, creation_date)
+            in_range = (not cutoff_date or cutoff_date <= creation_date) and (not until_date or creation_date <= until_date)
+            # A resource given by name is listed whatever its date or name pattern; the set lookup goes first
+            # so named resources never reach the regex, and the others run it at most once
+            if ami_name in names_set or (in_range and (pattern_search is None or pattern_search(ami_name))):
+                yield {
                     'ImageId': image['ImageId'],
                     'Name': ami_name,
                     'CreationDate': creation_date_str
-                })
-    return amis_to_delete
+                }
+
+# Function to map AMI ids to the ids of the snapshots whose description references them
+def index_snapshots_by_ami(ec2_client):
+    snapshots_by_ami = defaultdict(list)
+    for page in ec2_client.get_paginator('describe_snapshots').paginate(OwnerIds=['self']):
+        for snapshot in page['Snapshots']:
+            for image_id in AMI_ID_RE.findall(snapshot.get('Description', '')):
+                snapshots_by_ami[image_id].append(snapshot['SnapshotId'])
+    return snapshots_by_ami
+
+# Function to delete a snapshot that belonged to an AMI
+def delete_ami_snapshot(ec2_client, snapshot_id, image_id):
+    try:
+        ec2_client.delete_snapshot(SnapshotId=snapshot_id)
+        logging.info(f"Deleted snapshot: {snapshot_id} for AMI: {image_id}")
+    except ec2_client.exceptions.ClientError as e:
+        logging.error(f"Error deleting snapshot {snapshot_id} for AMI {image_id}: {e}")
 
-# Function to delete AMIs
-def delete_ami(ec2_client, image_id):
+# Function to delete AMIs; snapshot_ids come from index_snapshots_by_ami instead of a describe call per AMI
+def delete_ami(ec2_client, image_id, snapshot_ids):
     try:
         ec2_client.deregister_image(ImageId=image_id)
         logging.info(f"Deregistered AMI: {image_id}")
-        snapshots = ec2_client.describe_snapshots(Filters=[{'Name': 'description', 'Values': [f'*{image_id}*']}])
-        for snapshot in snapshots['Snapshots']:
-            try:
-                ec2_client.delete_snapshot(SnapshotId=snapshot['SnapshotId'])
-                logging.info(f"Deleted snapshot: {snapshot['SnapshotId']} for AMI: {image_id}")
-            except ec2_client.exceptions.ClientError as e:
-                logging.error(f"Error deleting snapshot {snapshot['SnapshotId']} for AMI {image_id}: {e}")
+        # The AMI's snapshots are independent of each other, so delete them concurrently
+        if snapshot_ids:
+            with ThreadPoolExecutor(max_workers=min(8, len(snapshot_ids))) as executor:
+                list(executor.map(lambda snapshot_id: delete_ami_snapshot(ec2_client, snapshot_id, image_id), snapshot_ids))
     except ec2_client.exceptions.ClientError as e:
         logging.error(f"Error deleting AMI {image_id}: {e}")
 
 # Function to list Image Pipelines based on provided criteria
-def list_image_pipelines(imagebuilder_client, cutoff_date, until_date, pattern=None):
-    pipelines_to_delete = []
-    response = imagebuilder_client.list_image_pipelines()
-    for pipeline in response['imagePipelineList']:
-        pipeline_name = pipeline.get('name', '')
-        creation_time_str = pipeline['dateCreated']
-        creation_time = datetime.strptime(creation_time_str, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
-        logging.debug(f"Checking Image Pipeline: {pipeline_name} with Creation Time: {creation_time}")
-        if (not cutoff_date or cutoff_date <= creation_time) and (not until_date or creation_time <= until_date):
-            if pattern is None or re.search(pattern, pipeline_name, re.IGNORECASE):
-                pipelines_to_delete.append({
+def list_image_pipelines(imagebuilder_client, cutoff_date, until_date, pattern_search=None, names_set=frozenset()):
+    # Yield matches page by page; a single call only returns the first page
+    for page in imagebuilder_client.get_paginator('list_image_pipelines').paginate():
+        for pipeline in page['imagePipelineList']:
+            pipeline_name = pipeline.get('name', '')
+            creation_time_str = pipeline['dateCreated']
+            creation_time = datetime.fromisoformat(creation_time_str.replace('Z', '+00:00'))
+            logging.debug("Checking Image Pipeline: %s with Creation Time: %s", pipeline_name, creation_time)
+            in_range = (not cutoff_date or cutoff_date <= creation_time) and (not until_date or creation_time <= until_date)
+            if pipeline_name in names_set or (in_range and (pattern_search is None or pattern_search(pipeline_name))):
+                yield {
                     'Arn': pipeline['arn'],
                     'Name': pipeline_name,
                     'CreationTime': creation_time_str
-                })
-    return pipelines_to_delete
+                }
 
 # Function to delete Image Pipelines
 def delete_image_pipeline(imagebuilder_client, pipeline_arn):
@@ -84,33 +150,37 @@ def delete_image_pipeline(imagebuilder_client, pipeline_arn):
         logging.error(f"Error deleting Image Pipeline {pipeline_arn}: {e}")
 
 # Function to list Images based on provided criteria
-def list_images(imagebuilder_client, cutoff_date, until_date, pattern=None):
-    images_to_delete = []
-    response = imagebuilder_client.list_images()
-    for image in response['imageVersionList']:
-        image_arn = image['arn']
-        image_name = image.get('name', '')
-        logging.debug(f"Processing Image: {image_name} ({image_arn})")
-        try:
-            build_versions = imagebuilder_client.list_image_build_versions(imageVersionArn=image_arn)
-            logging.debug(f"Response for image build versions: {build_versions}")
-            if 'imageSummaryList' in build_versions:
-                for build_version in build_versions['imageSummaryList']:
-                    creation_time_str = build_version['dateCreated']
-                    creation_time = datetime.strptime(creation_time_str, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
-                    logging.debug(f"Checking Image Build Version: {build_version['arn']} with Creation Time: {creation_time}")
-                    if (not cutoff_date or cutoff_date <= creation_time) and (not until_date or creation_time <= until_date):
-                        if pattern is None or re.search(pattern, image_name, re.IGNORECASE):
-                            images_to_delete.append({
+def list_images(imagebuilder_client, cutoff_date, until_date, pattern_search=None, names_set=frozenset()):
+    # Yield matches page by page; a single call only returns the first page
+    for page in imagebuilder_client.get_paginator('list_images').paginate():
+        for image in page['imageVersionList']:
+            image_arn = image['arn']
+            image_name = image.get('name', '')
+            logging.debug("Processing Image: %s (%s)", image_name, image_arn)
+            # The name filters apply to the parent image, so skip listing the build versions of images they exclude
+            name_selected = image_name in names_set
+            name_matches = name_selected or pattern_search is None or bool(pattern_search(image_name))
+            if not name_matches:
+                continue
+            try:
+                for build_versions in imagebuilder_client.get_paginator('list_image_build_versions').paginate(imageVersionArn=image_arn):
+                    logging.debug("Response for image build versions: %s", build_versions)
+                    if 'imageSummaryList' not in build_versions:
+                        logging.warning(f"No imageSummaryList found for image ARN: {image_arn}")
+                        continue
+                    for build_version in build_versions['imageSummaryList']:
+                        creation_time_str = build_version['dateCreated']
+                        creation_time = datetime.fromisoformat(creation_time_str.replace('Z', '+00:00'))
+                        logging.debug("Checking Image Build Version: %s with Creation Time: %s", build_version['arn'], creation_time)
+                        in_range = (not cutoff_date or cutoff_date <= creation_time) and (not until_date or creation_time <= until_date)
+                        if name_selected or (in_range and name_matches):
+                            yield {
                                 'Arn': build_version['arn'],
                                 'Name': image_name,
                                 'CreationTime': creation_time_str
-                            })
-            else:
-                logging.warning(f"No imageSummaryList found for image ARN: {image_arn}")
-        except imagebuilder_client.exceptions.ClientError as e:
-            logging.error(f"Error listing build versions for image {image_arn}: {e}")
-    return images_to_delete
+                            }
+            except imagebuilder_client.exceptions.ClientError as e:
+                logging.error(f"Error listing build versions for image {image_arn}: {e}")
 
 # Function to delete Images
 def delete_image(imagebuilder_client, image_arn):
@@ -122,25 +192,32 @@ def delete_image(imagebuilder_client, image_arn):
         logging.error(f"Error deleting Image Version {image_arn}: {e}")
 
 # Function to list Snapshots based on provided criteria
-def list_snapshots(ec2_client, cutoff_date, until_date, pattern=None):
-    snapshots_to_delete = []
-    response = ec2_client.describe_snapshots(OwnerIds=['self'])
-    for snapshot in response['Snapshots']:
-        snapshot_name = ''
-        for tag in snapshot.get('Tags', []):
-            if tag['Key'] == 'Name':
-                snapshot_name = tag['Value']
-        creation_time_str = snapshot['StartTime'].strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-        creation_time = snapshot['StartTime']
-        logging.debug(f"Checking Snapshot: {snapshot_name} with Creation Time: {creation_time}")
-        if (not cutoff_date or cutoff_date <= creation_time) and (not until_date or creation_time <= until_date):
-            if pattern is None or re.search(pattern, snapshot_name, re.IGNORECASE):
-                snapshots_to_delete.append({
+def list_snapshots(ec2_client, cutoff_date, until_date, pattern_search=None, names_set=frozenset(), snapshots_by_ami=None, name_glob=None):
+    describe_kwargs = {'OwnerIds': ['self']}
+    if name_glob:
+        # EC2 applies the glob to the Name tag server-side; named snapshots are added to the filter values so they are still returned
+        describe_kwargs['Filters'] = [{'Name': 'tag:Name', 'Values': [name_glob, *names_set]}]
+    # Yield matches page by page instead of holding every snapshot in memory
+    for page in ec2_client.get_paginator('describe_snapshots').paginate(**describe_kwargs):
+        for snapshot in page['Snapshots']:
+            snapshot_name = ''
+            for tag in snapshot.get('Tags', []):
+                if tag['Key'] == 'Name':
+                    snapshot_name = tag['Value']
+            # Index the AMI snapshots from this same listing when AMIs are being deleted too
+            if snapshots_by_ami is not None:
+                for image_id in AMI_ID_RE.findall(snapshot.get('Description', '')):
+                    snapshots_by_ami[image_id].append(snapshot['SnapshotId'])
+            creation_time_str = snapshot['StartTime'].strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            creation_time = snapshot['StartTime']
+            logging.debug("Checking Snapshot: %s with Creation Time: %s", snapshot_name, creation_time)
+            in_range = (not cutoff_date or cutoff_date <= creation_time) and (not until_date or creation_time <= until_date)
+            if snapshot_name in names_set or (in_range and (pattern_search is None or pattern_search(snapshot_name))):
+                yield {
                     'SnapshotId': snapshot['SnapshotId'],
                     'Name': snapshot_name,
                     'CreationTime': creation_time_str
-                })
-    return snapshots_to_delete
+                }
 
 # Function to delete Snapshots
 def delete_snapshot(ec2_client, snapshot_id):
@@ -153,6 +230,27 @@ def delete_snapshot(ec2_client, snapshot_id):
         else:
             logging.error(f"Error deleting Snapshot {snapshot_id}: {e}")
 
+# Deletion function per resource type; each takes the clients, the resource and the AMI snapshot index
+DELETERS = {
+    'ami': lambda clients, resource, snapshots_by_ami: delete_ami(clients['ec2'], resource['ImageId'], snapshots_by_ami.get(resource['ImageId'], [])),
+    'pipeline': lambda clients, resource, _: delete_image_pipeline(clients['imagebuilder'], resource['Arn']),
+    'image': lambda clients, resource, _: delete_image(clients['imagebuilder'], resource['Arn']),
+    'snapshot': lambda clients, resource, _: delete_snapshot(clients['ec2'], resource['SnapshotId']),
+}
+
+# Function to parse the answer to the selection prompt into a set of 1-based indexes; returns None if it is invalid
+def parse_selection(answer, count):
+    answer = answer.strip().lower()
+    if answer in ('all', 'yes'):
+        return set(range(1, count + 1))
+    if answer in ('none', 'no', ''):
+        return set()
+    try:
+        selected = {int(part) for part in answer.split(',') if part.strip()}
+    except ValueError:
+        return None
+    return selected if all(1 <= index <= count for index in selected) else None
+
 def main():
     parser = argparse.ArgumentParser(description="Delete AWS resources matching specific criteria.")
     parser.add_argument("--resource-types", nargs='+', choices=['ami', 'pipeline', 'image', 'snapshot'], required=True, help="Types of resources to delete.")
@@ -160,6 +258,8 @@ def main():
     parser.add_argument("--until-date", default=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
                         help="Until date-time in format YYYY-MM-DDTHH:MM:SSZ (UTC), default is now")
     parser.add_argument("--pattern", "-p", help="Pattern to filter resource names for deletion.")
+    parser.add_argument("--name-glob", "-g", help="Shell-style glob (case-sensitive) resource names must also match, e.g. 'es-*'; "
+                                                   "EC2 applies it server-side to AMI names and snapshot Name tags.")
     parser.add_argument("--resource-names", nargs='*', help="List of specific resource names to delete.")
     parser.add_argument("--force", "-f", action="store_true", help="Force deletion without confirmation")
     parser.add_argument("--log-file", "-l", help="Log file to store the output")
@@ -184,162 +284,102 @@ def main():
     setup_logger(log_file)
 
     # Initialize clients
-    ec2_client = boto3.client('ec2')
-    imagebuilder_client = boto3.client('imagebuilder')
+    ec2_client, imagebuilder_client = get_clients()
+    clients = {'ec2': ec2_client, 'imagebuilder': imagebuilder_client}
 
-    # Dictionary to store resources to delete
-    resources_to_delete = {resource_type: [] for resource_type in args.resource_types}
+    # Compile the pattern once instead of on every name checked
+    pattern_search = compile_pattern(args.pattern)
 
-    # List resources based on date range and pattern if provided
-    if cutoff_date or args.pattern:
+    # Names are matched in the same pass as the date range and pattern, so every resource type is listed once
+    names_set = set(args.resource_names or ())
 
+    if cutoff_date or args.pattern:
         logging.info(f"Listing resources created between {cutoff_date} and {until_date} with pattern {args.pattern}...")
-
-        if 'ami' in args.resource_types:
-            resources_to_delete['ami'].extend(list_amis(ec2_client, cutoff_date, until_date, pattern=args.pattern))
-        if 'pipeline' in args.resource_types:
-            resources_to_delete['pipeline'].extend(list_image_pipelines(imagebuilder_client, cutoff_date, until_date, pattern=args.pattern))
-        if 'image' in args.resource_types:
-            resources_to_delete['image'].extend(list_images(imagebuilder_client, cutoff_date, until_date, pattern=args.pattern))
-        if 'snapshot' in args.resource_types:
-            resources_to_delete['snapshot'].extend(list_snapshots(ec2_client, cutoff_date, until_date, pattern=args.pattern))
-
-    # List all resources if neither cutoff_date nor pattern is provided
-    if not cutoff_date and not args.pattern:
+    else:
+        # List all resources if neither cutoff_date nor pattern is provided
         logging.info("No cutoff date or pattern provided. Listing all resources of the specified types...")
-
-        if 'ami' in args.resource_types:
-            resources_to_delete['ami'].extend(list_amis(ec2_client, None, until_date))
-        if 'pipeline' in args.resource_types:
-            resources_to_delete['pipeline'].extend(list_image_pipelines(imagebuilder_client, None, until_date))
-        if 'image' in args.resource_types:
-            resources_to_delete['image'].extend(list_images(imagebuilder_client, None, until_date))
-        if 'snapshot' in args.resource_types:
-            resources_to_delete['snapshot'].extend(list_snapshots(ec2_client, None, until_date))
-
-    # List resources based on specific names if provided
-    if args.resource_names:
-        resource_names = args.resource_names
-        logging.info(f"Listing resources with specific names: {resource_names}")
-
-        if 'ami' in args.resource_types:
-            response = ec2_client.describe_images(Owners=['self'])
-            for image in response['Images']:
-                if image.get('Name') in resource_names:
-                    resources_to_delete['ami'].append({
-                        'ImageId': image['ImageId'],
-                        'Name': image.get('Name', 'N/A'),
-                        'CreationDate': image['CreationDate']
-                    })
-
-        if 'pipeline' in args.resource_types:
-            response = imagebuilder_client.list_image_pipelines()
-            for pipeline in response['imagePipelineList']:
-                if pipeline.get('name') in resource_names:
-                    resources_to_delete['pipeline'].append({
-                        'Arn': pipeline['arn'],
-                        'Name': pipeline.get('name', 'N/A'),
-                        'CreationTime': pipeline['dateCreated']
-                    })
-
-        if 'image' in args.resource_types:
-            response = imagebuilder_client.list_images()
-            for image in response['imageVersionList']:
-                if image.get('name') in resource_names:
-                    # List image build versions
-                    build_versions = imagebuilder_client.list_image_build_versions(imageVersionArn=image['arn'])
-                    logging.debug(f"Response for image build versions: {build_versions}")
-                    if 'imageSummaryList' in build_versions:
-                        for build_version in build_versions['imageSummaryList']:
-                            resources_to_delete['image'].append({
-                                'Arn': build_version['arn'],
-                                'Name': image.get('name', 'N/A'),
-                                'CreationTime': build_version['dateCreated']
-                            })
-                    else:
-                        logging.warning(f"No imageSummaryList found for image ARN: {image['arn']}")
-
-        if 'snapshot' in args.resource_types:
-            response = ec2_client.describe_snapshots(OwnerIds=['self'])
-            for snapshot in response['Snapshots']:
-                snapshot_name = ''
-                for tag in snapshot.get('Tags', []):
-                    if tag['Key'] == 'Name' and tag['Value'] in resource_names:
-                        snapshot_name = tag['Value']
-                        resources_to_delete['snapshot'].append({
-                            'SnapshotId': snapshot['SnapshotId'],
-                            'Name': snapshot_name,
-                            'CreationTime': snapshot['StartTime'].strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-                        })
-
-    # Remove duplicates from the resources to delete
-    for resource_type in args.resource_types:
-        if resource_type == 'ami':
-            resources_to_delete[resource_type] = list({ami['ImageId']: ami for ami in resources_to_delete[resource_type]}.values())
-        elif resource_type == 'pipeline':
-            resources_to_delete[resource_type] = list({pipeline['Arn']: pipeline for pipeline in resources_to_delete[resource_type]}.values())
-        elif resource_type == 'image':
-            resources_to_delete[resource_type] = list({image['Arn']: image for image in resources_to_delete[resource_type]}.values())
-        elif resource_type == 'snapshot':
-            resources_to_delete[resource_type] = list({snapshot['SnapshotId']: snapshot for snapshot in resources_to_delete[resource_type]}.values())
-
-    # Summary of resources to delete
+    if names_set:
+        logging.info(f"Listing resources with specific names: {args.resource_names}")
+
+    if args.name_glob:
+        logging.info(f"Listing only resources with names matching the glob {args.name_glob}")
+
+    # Image Builder has no server-side glob filter, so the glob is checked along with the pattern there
+    image_builder_search = pattern_search
+    if args.name_glob:
+        image_builder_search = lambda name: fnmatchcase(name, args.name_glob) and (pattern_search is None or bool(pattern_search(name)))
+
+    # With AMIs and snapshots both selected, the snapshot listing also builds the AMI snapshot index, so snapshots are listed only once;
+    # not when the glob narrows that listing, as the AMI snapshots would be missing from it
+    snapshots_by_ami = defaultdict(list) if {'ami', 'snapshot'} <= set(args.resource_types) and not args.name_glob else None
+
+    # Listing function per resource type
+    listers = {
+        'ami': lambda: list_amis(ec2_client, cutoff_date, until_date, pattern_search=pattern_search, names_set=names_set, name_glob=args.name_glob),
+        'pipeline': lambda: list_image_pipelines(imagebuilder_client, cutoff_date, until_date, pattern_search=image_builder_search, names_set=names_set),
+        'image': lambda: list_images(imagebuilder_client, cutoff_date, until_date, pattern_search=image_builder_search, names_set=names_set),
+        'snapshot': lambda: list_snapshots(ec2_client, cutoff_date, until_date, pattern_search=pattern_search, names_set=names_set,
+                                           snapshots_by_ami=snapshots_by_ami, name_glob=args.name_glob),
+    }
+
+    # Dictionary to store resources to delete; each listing generator is consumed straight into its list
+    resources_to_delete = {resource_type: list(listers[resource_type]()) for resource_type in args.resource_types}
+
+    # Summary of resources to delete, numbered across all types so they can be picked by index
+    indexed_resources = []
     for resource_type in args.resource_types:
         logging.info(f"Found {len(resources_to_delete[resource_type])} {resource_type}s matching the criteria:")
         if resources_to_delete[resource_type]:
             logging.info(f"{resource_type.capitalize()}s to be deleted:")
             for resource in resources_to_delete[resource_type]:
-                if resource_type == 'ami':
-                    logging.info(f" - {resource['ImageId']} (Name: {resource['Name']}, CreationDate: {resource['CreationDate']})")
-                elif resource_type == 'snapshot':
-                    logging.info(f" - {resource['SnapshotId']} (Name: {resource['Name']}, CreationTime: {resource['CreationTime']})")
-                else:
-                    logging.info(f" - {resource['Arn']} (Name: {resource['Name']}, CreationTime: {resource['CreationTime']})")
+                indexed_resources.append((resource_type, resource))
+                index = len(indexed_resources)
+                date_key = DATE_KEY[resource_type]
+                logging.info(f" - [{index}] {resource[ID_KEY[resource_type]]} (Name: {resource['Name']}, {date_key}: {resource[date_key]})")
 
     # Check if there are any resources to delete
-    total_resources_to_delete = sum(len(resources_to_delete[resource_type]) for resource_type in args.resource_types)
-    if total_resources_to_delete == 0:
+    if not indexed_resources:
         logging.info("No resources found to delete.")
         sys.exit(0)
-    
-    # Prompt to delete all resources
+
+    # Confirm the whole plan with a single prompt instead of one prompt per resource
     if not args.force:
-        confirm_all = input("Do you want to delete them all? (yes/no): ")
-        logging.info(f"User prompt response: {confirm_all}")
-        delete_all = confirm_all.lower() == 'yes'
+        selected = None
+        while selected is None:
+            answer = input("Enter 'all' to delete them all, 'none' to delete nothing, or comma-separated indexes to delete: ")
+            logging.info(f"User prompt response: {answer}")
+            selected = parse_selection(answer, len(indexed_resources))
+            if selected is None:
+                print(f"Invalid selection; use 'all', 'none', or indexes between 1 and {len(indexed_resources)}.")
     else:
-        delete_all = True
+        selected = set(range(1, len(indexed_resources) + 1))
+
+    confirmed_resources = [item for index, item in enumerate(indexed_resources, start=1) if index in selected]
+    logging.info(f"Deleting {len(confirmed_resources)} of {len(indexed_resources)} resources")
+
+    # Look up the snapshots of every AMI with one paginated listing rather than a describe call per AMI,
+    # unless the snapshot listing above already indexed them
+    if snapshots_by_ami is None:
+        snapshots_by_ami = {}
+        if any(resource_type == 'ami' for resource_type, _ in confirmed_resources):
+            snapshots_by_ami = index_snapshots_by_ami(ec2_client)
 
     success = True  # Track the success of resource deletions
-    for resource_type in args.resource_types:
-        for resource in resources_to_delete[resource_type]:
-            try:
-                if delete_all:
-                    if resource_type == 'ami':
-                        delete_ami(ec2_client, resource['ImageId'])
-                    elif resource_type == 'pipeline':
-                        delete_image_pipeline(imagebuilder_client, resource['Arn'])
-                    elif resource_type == 'image':
-                        delete_image(imagebuilder_client, resource['Arn'])
-                    elif resource_type == 'snapshot':
-                        delete_snapshot(ec2_client, resource['SnapshotId'])
-                else:
-                    confirm_each = input(f"Do you want to delete the {resource_type} {resource['ImageId' if resource_type == 'ami' else 'Arn' if resource_type in ['pipeline', 'image'] else 'SnapshotId']} (Name: {resource['Name']})? (yes/no): ")
-                    logging.info(f"User prompt response for {resource['ImageId' if resource_type == 'ami' else 'Arn' if resource_type in ['pipeline', 'image'] else 'SnapshotId']}: {confirm_each}")
-                    if confirm_each.lower() == 'yes':
-                        if resource_type == 'ami':
-                            delete_ami(ec2_client, resource['ImageId'])
-                        elif resource_type == 'pipeline':
-                            delete_image_pipeline(imagebuilder_client, resource['Arn'])
-                        elif resource_type == 'image':
-                            delete_image(imagebuilder_client, resource['Arn'])
-                        elif resource_type == 'snapshot':
-                            delete_snapshot(ec2_client, resource['SnapshotId'])
-                    else:
-                        logging.info(f"Skipping deletion of {resource_type}: {resource['ImageId' if resource_type == 'ami' else 'Arn' if resource_type in ['pipeline', 'image'] else 'SnapshotId']}")
-            except Exception as e:
-                logging.error(f"Error during deletion of {resource_type} {resource['ImageId' if resource_type == 'ami' else 'Arn' if resource_type in ['pipeline', 'image'] else 'SnapshotId']}: {e}")
-                success = False
+    # Each deletion is an independent, I/O-bound API call, so run them in a bounded pool. AMIs are deregistered
+    # to completion first: a snapshot still backing a registered AMI can't be deleted (InvalidSnapshot.InUse)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        ami_resources = [item for item in confirmed_resources if item[0] == 'ami']
+        other_resources = [item for item in confirmed_resources if item[0] != 'ami']
+        for phase_resources in (ami_resources, other_resources):
+            futures = {executor.submit(DELETERS[resource_type], clients, resource, snapshots_by_ami): (resource_type, resource)
+                       for resource_type, resource in phase_resources}
+            for future in as_completed(futures):
+                resource_type, resource = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error during deletion of {resource_type} {resource[ID_KEY[resource_type]]}: {e}")
+                    success = False
 
     # Rename the log file if any resource failed to delete; assign exit_code value for later call
     if not success:
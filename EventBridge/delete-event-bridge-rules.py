@@ -1,10 +1,32 @@
 import boto3
+from botocore.config import Config
 import logging
+import logging.handlers
+import queue
+import atexit
 from datetime import datetime, timezone
 import sys
 import argparse
 import os
 import re
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Number of rules deleted at the same time
+MAX_WORKERS = 16
+
+# Largest number of target ids a single remove_targets call accepts
+REMOVE_TARGETS_MAX_IDS = 100
+
+# Regex metacharacters; a --pattern without any is matched as a plain substring
+REGEX_SPECIAL_CHARS = set('.^$*+?{}[]\\|()')
+
+# Client config: room in the connection pool for the worker threads, kept-alive connections, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=32, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
+def get_client():
+    """Create the EventBridge client from an explicit session rather than the module-level default."""
+    return boto3.session.Session().client('events', config=BOTO_CFG)
 
 # Configure logging
 def setup_logger(log_file):
@@ -20,23 +42,37 @@ def setup_logger(log_file):
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
     
+    # Hand file records to a background listener so the deletion threads never block on file I/O; the console
+    # handler stays synchronous so the summary is always printed before the confirmation prompts
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    # Stopping the listener drains the queue, so no record is lost on any exit path
+    atexit.register(listener.stop)
+
     # Add handlers to the logger
     logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
-def list_eventbridge_rules(events_client, pattern=None):
-    """List all EventBridge rules, optionally filtering by a pattern."""
-    rules_to_delete = []
-    # if no pattern provided, return an empty list of rules_to_delete
+def compile_pattern(pattern):
+    """Return a case-insensitive search function for the pattern (a substring test when it has no regex syntax), or None without a pattern."""
     if not pattern:
-        return rules_to_delete
+        return None
+    if not REGEX_SPECIAL_CHARS.intersection(pattern):
+        needle = pattern.lower()
+        return lambda name: needle in name.lower()
+    return re.compile(pattern, re.IGNORECASE).search
+
+def list_eventbridge_rules(events_client, pattern_search=None):
+    """Yield the names of all EventBridge rules matching the pattern search function; yield nothing without a pattern."""
+    if not pattern_search:
+        return
 
     paginator = events_client.get_paginator('list_rules')
     for page in paginator.paginate():
         for rule in page['Rules']:
-            if re.search(pattern, rule['Name'], re.IGNORECASE):
-                rules_to_delete.append(rule['Name'])
-    return rules_to_delete
+            if pattern_search(rule['Name']):
+                yield rule['Name']
 
 
 def delete_eventbridge_rule(events_client, rule_name, retries=3):
@@ -45,10 +81,13 @@ def delete_eventbridge_rule(events_client, rule_name, retries=3):
         try:
             # First, remove all targets associated with the rule.
             # Targets themselves are not deleted. They are simply detached from EventBridge rules.
-            targets = events_client.list_targets_by_rule(Rule=rule_name)['Targets']
-            if targets:
-                target_ids = [target['Id'] for target in targets]
-                events_client.remove_targets(Rule=rule_name, Ids=target_ids)
+            # Page through the targets so none are left behind on rules with many targets
+            target_ids = [target['Id'] for page in events_client.get_paginator('list_targets_by_rule').paginate(Rule=rule_name)
+                          for target in page['Targets']]
+            if target_ids:
+                # remove_targets accepts a limited number of ids per call
+                for i in range(0, len(target_ids), REMOVE_TARGETS_MAX_IDS):
+                    events_client.remove_targets(Rule=rule_name, Ids=target_ids[i:i + REMOVE_TARGETS_MAX_IDS])
                 logging.info(f"Removed targets from rule: {rule_name}")
             
             # Now delete the rule
@@ -108,17 +147,20 @@ def main():
         else:
             exclude_rules = [rule.strip() for rule in args.exclude_rules.split(',')]
 
-    events_client = boto3.client('events')
+    events_client = get_client()
 
-    rules_to_delete = args.rules if args.rules else []
+    # Compile the pattern once instead of on every rule name checked
+    pattern_search = compile_pattern(args.pattern)
 
-    # add the pattern_matched_rules to rules provided provided as arguments 
-    if args.pattern:
-        pattern_matched_rules = list_eventbridge_rules(events_client, args.pattern)
-        rules_to_delete.extend(pattern_matched_rules)
-    
-    # Remove duplicates and filter out the excluded rules
-    rules_to_delete = list(set(rules_to_delete) - set(exclude_rules))
+    # Stream the rules provided as arguments followed by the pattern-matched rules, removing duplicates and
+    # the excluded rules in one pass while keeping the order the rules were given in
+    excluded_rules = set(exclude_rules)
+    seen_rules = set()
+    rules_to_delete = []
+    for rule_name in chain(args.rules or (), list_eventbridge_rules(events_client, pattern_search)):
+        if rule_name not in seen_rules and rule_name not in excluded_rules:
+            seen_rules.add(rule_name)
+            rules_to_delete.append(rule_name)
     
     # Summary of rules to delete
     logging.info(f"Found {len(rules_to_delete)} rules matching the criteria:")
@@ -138,21 +180,30 @@ def main():
         else:
             delete_all = True
 
-    success = True  # Track the success of rule deletions
+    # Collect the confirmations first so the deletions below can run concurrently
+    confirmed_rules = []
     for rule_name in rules_to_delete:
-        try:
-            if delete_all:
-                delete_eventbridge_rule(events_client, rule_name)
+        if delete_all:
+            confirmed_rules.append(rule_name)
+        else:
+            confirm_each = input(f"Do you want to delete the rule {rule_name}? (yes/no): ")
+            logging.info(f"User prompt response for {rule_name}: {confirm_each}")
+            if confirm_each.lower() == 'yes':
+                confirmed_rules.append(rule_name)
             else:
-                confirm_each = input(f"Do you want to delete the rule {rule_name}? (yes/no): ")
-                logging.info(f"User prompt response for {rule_name}: {confirm_each}")
-                if confirm_each.lower() == 'yes':
-                    delete_eventbridge_rule(events_client, rule_name)
-                else:
-                    logging.info(f"Skipping deletion of rule: {rule_name}")
-        except Exception as e:
-            logging.error(f"Error during deletion of rule {rule_name}: {e}")
-            success = False
+                logging.info(f"Skipping deletion of rule: {rule_name}")
+
+    success = True  # Track the success of rule deletions
+    # Each rule deletion is independent and I/O-bound, so run them in a bounded pool
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(delete_eventbridge_rule, events_client, rule_name): rule_name for rule_name in confirmed_rules}
+        for future in as_completed(futures):
+            rule_name = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Error during deletion of rule {rule_name}: {e}")
+                success = False
 
     # Rename the log file if any rule failed to delete; assign exit_code value for later call
     if not success:
@@ -1,9 +1,25 @@
 import boto3
+from botocore.config import Config
 import logging
 from datetime import datetime, timezone
 import sys
 import argparse
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Number of log groups deleted at the same time
+MAX_WORKERS = 32
+
+# Client config: room in the connection pool for the worker threads, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=2 * MAX_WORKERS, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
+# Characters DescribeLogGroups accepts in logGroupNamePattern
+LOG_GROUP_NAME_PATTERN_RE = re.compile(r'[.\-_/#A-Za-z0-9]+')
+
+# Letters are matched case-sensitively server-side, and '.' is kept local too, so a pattern with either
+# is only sent to the server when --server-side-pattern asks for it
+SERVER_SENSITIVE_CHARS_RE = re.compile(r'[A-Za-z.]')
 
 # Configure logging
 def setup_logger(log_file):
@@ -23,51 +39,48 @@ def setup_logger(log_file):
     logger.addHandler(console_handler)
     logger.addHandler(file_handler)
 
-def list_log_groups_created_between(cw_client, cutoff_date, until_date, exclude_log_groups, pattern=None):
+def list_log_groups_created_between(cw_client, cutoff_date, until_date, exclude_log_groups, pattern=None, prefix=None, server_side_pattern=False):
     """List all CloudWatch log groups created between the specified cutoff date and until date, excluding specific log groups."""
+    # exclude_log_groups is a set, so each membership check is constant-time
     log_groups_to_delete = []
+    paginate_kwargs = {'PaginationConfig': {'PageSize': 50}}  # 50 is the largest page DescribeLogGroups returns
+    # Let CloudWatch filter by name server-side (prefix and pattern are mutually exclusive there) when that matches
+    # the same log groups as the local case-insensitive check; otherwise the pattern is matched locally
+    if prefix:
+        paginate_kwargs['logGroupNamePrefix'] = prefix
+    elif pattern and LOG_GROUP_NAME_PATTERN_RE.fullmatch(pattern) and (server_side_pattern or not SERVER_SENSITIVE_CHARS_RE.search(pattern)):
+        paginate_kwargs['logGroupNamePattern'] = pattern
+        pattern = None
+    pattern_lc = pattern.lower() if pattern else None  # Lowercased once instead of per log group
+    # creationTime is in milliseconds since the epoch, so compare it to the bounds as plain integers
+    cutoff_ms = int(cutoff_date.timestamp() * 1000)
+    until_ms = int(until_date.timestamp() * 1000)
     paginator = cw_client.get_paginator('describe_log_groups')
-    for page in paginator.paginate():
+    for page in paginator.paginate(**paginate_kwargs):
         for log_group in page['logGroups']:
-            creation_time = datetime.fromtimestamp(log_group['creationTime'] / 1000, tz=timezone.utc)
-            if cutoff_date < creation_time <= until_date and log_group['logGroupName'] not in exclude_log_groups:
-                if pattern and pattern.lower() not in log_group['logGroupName'].lower():
+            if cutoff_ms < log_group['creationTime'] <= until_ms and log_group['logGroupName'] not in exclude_log_groups:
+                if pattern_lc and pattern_lc not in log_group['logGroupName'].lower():
                     continue
                 log_groups_to_delete.append(log_group['logGroupName'])
     return log_groups_to_delete
 
-def delete_log_group(cw_client, log_group_name, force, retries=3):
-    """Delete the specified CloudWatch log group with retry logic."""
+def delete_log_group(cw_client, log_group_name):
+    """Delete the specified CloudWatch log group; throttling and transient errors are retried by the client's adaptive retry mode."""
     try:
-        for attempt in range(retries):
-            if not force:
-                confirm = input(f"Are you sure you want to delete the log group {log_group_name}? (yes/no): ")
-                if confirm.lower() != 'yes':
-                    logging.info(f"Skipping deletion of log group: {log_group_name}")
-                    return
-
-            cw_client.delete_log_group(logGroupName=log_group_name)
-            logging.info(f"Initiated deletion of log group: {log_group_name}")
-            logging.info(f"Successfully deleted log group: {log_group_name}")
-            return
-
+        cw_client.delete_log_group(logGroupName=log_group_name)
+        logging.info(f"Successfully deleted log group: {log_group_name}")
     except cw_client.exceptions.ResourceNotFoundException:
         logging.error(f"Log group {log_group_name} not found.")
     except cw_client.exceptions.ClientError as e:
-        logging.error(f"Error deleting log group {log_group_name}: {e}")
-        if attempt < retries - 1:
-            logging.error(f"Retrying... (Attempt {attempt + 1}/{retries})")
-        else:
-            logging.error(f"Failed to delete log group {log_group_name} after {retries} attempts. Please investigate manually.")
-            return
+        logging.error(f"Failed to delete log group {log_group_name}: {e}. Please investigate manually.")
 
 def read_exclude_log_groups(file_path):
-    """Read the list of log group names to exclude from a file."""
+    """Read the set of log group names to exclude from a file."""
     if not os.path.isfile(file_path):
         logging.error(f"Exclude log groups file {file_path} not found!")
         sys.exit(1)
     with open(file_path, 'r') as file:
-        exclude_log_groups = [line.strip() for line in file if line.strip()]
+        exclude_log_groups = frozenset(line.strip() for line in file if line.strip())
     return exclude_log_groups
 
 def main():
@@ -80,10 +93,17 @@ def main():
         parser.add_argument("--force", "-f", action="store_true", help="Force deletion without confirmation")
         parser.add_argument("--log-file", "-l", help="Log file to store the output")
         parser.add_argument("--log-dir", "-d", help="Directory to store the log file", default="./.script-logs")
-        parser.add_argument("--pattern", "-p", help="Pattern to filter log groups for deletion")
+        parser.add_argument("--pattern", "-p", help="Pattern to filter log groups for deletion (case-insensitive)")
+        parser.add_argument("--server-side-pattern", action="store_true",
+                            help="Let CloudWatch match --pattern server-side, which is faster on large accounts but case-sensitive; "
+                                 "the pattern may only contain letters, digits and . - _ / #")
+        parser.add_argument("--prefix", help="Log group name prefix to filter log groups for deletion, matched server-side; cannot be combined with --pattern")
 
         args = parser.parse_args()
 
+        if args.pattern and args.prefix:
+            parser.error("--pattern and --prefix cannot be combined")
+
         try:
             cutoff_date = datetime.strptime(args.cutoff_date, "%Y-%m-%dT%H:%M:%SZ")
             cutoff_date = cutoff_date.replace(tzinfo=timezone.utc)
@@ -109,32 +129,44 @@ def main():
         logging.info("Logger setup complete.")
 
         # Handle exclude log groups
-        exclude_log_groups = []
+        exclude_log_groups = frozenset()
         if args.exclude_log_groups:
             if os.path.isfile(args.exclude_log_groups):
                 exclude_log_groups = read_exclude_log_groups(args.exclude_log_groups)
             else:
-                exclude_log_groups = [log_group.strip() for log_group in args.exclude_log_groups.split(',')]
+                exclude_log_groups = frozenset(log_group.strip() for log_group in args.exclude_log_groups.split(','))
 
         logging.info("Starting to list log groups.")
-        cw_client = boto3.client('logs')
+        cw_client = boto3.client('logs', config=BOTO_CFG)
 
-        log_groups_to_delete = list_log_groups_created_between(cw_client, cutoff_date, until_date, exclude_log_groups, args.pattern)
+        log_groups_to_delete = list_log_groups_created_between(cw_client, cutoff_date, until_date, exclude_log_groups, args.pattern, args.prefix, args.server_side_pattern)
         
         # Summary of log groups to delete
         logging.info(f"Found {len(log_groups_to_delete)} log groups created between {args.cutoff_date} and {args.until_date}")
         if log_groups_to_delete:
-            logging.info("Log groups to be deleted:")
-            for log_group_name in log_groups_to_delete:
-                logging.info(f" - {log_group_name}")
+            # One multi-line record instead of a record per log group
+            logging.info("Log groups to be deleted:\n%s", "\n".join(f" - {log_group_name}" for log_group_name in log_groups_to_delete))
+
+        # Confirm once for the whole list above, so the deletions below run without any prompts in between
+        confirmed_log_groups = log_groups_to_delete
+        if log_groups_to_delete and not args.force:
+            confirm = input(f"Delete {len(log_groups_to_delete)} log groups? (yes/no): ")
+            logging.info(f"User prompt response: {confirm}")
+            if confirm.lower() != 'yes':
+                logging.info("Skipping deletion of all listed log groups.")
+                confirmed_log_groups = []
 
         success = True  # Track the success of log group deletions
-        for log_group_name in log_groups_to_delete:
-            try:
-                delete_log_group(cw_client, log_group_name, args.force)
-            except Exception as e:
-                logging.error(f"Error during deletion of log group {log_group_name}: {e}")
-                success = False
+        # Each deletion is an independent, I/O-bound API call, so run them in a bounded pool
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {executor.submit(delete_log_group, cw_client, log_group_name): log_group_name for log_group_name in confirmed_log_groups}
+            for future in as_completed(futures):
+                log_group_name = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error during deletion of log group {log_group_name}: {e}")
+                    success = False
 
         # Rename the log file if any log group failed to delete; assign exit_code value for later call
         if not success:
@@ -1,8 +1,20 @@
 import boto3
 import json
 import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Configure logging; unlike print, logging is safe to call from the worker threads
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Number of buckets updated at the same time
+MAX_WORKERS = 16
+
+# Client config: a connection per worker thread with headroom, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=2 * MAX_WORKERS, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
 def get_bucket_policy(s3_client, bucket_name):
     """Get the current bucket policy."""
     try:
@@ -32,27 +44,29 @@ def update_bucket_policy(s3_client, bucket_name):
     }
 
     # Check if the policy statement already exists
-    for statement in policy["Statement"]:
-        if statement.get("Sid") == "DenyDeleteBucket":
-            print(f"The policy statement already exists in the bucket {bucket_name}.")
-            return
+    existing_sids = {statement.get("Sid") for statement in policy["Statement"]}
+    if deny_delete_statement["Sid"] in existing_sids:
+        logging.info(f"The policy statement already exists in the bucket {bucket_name}.")
+        return
 
     # Add the new policy statement
     policy["Statement"].append(deny_delete_statement)
 
     # Update the bucket policy
-    s3_client.put_bucket_policy(Bucket=bucket_name, Policy=json.dumps(policy))
-    print(f"Updated policy for bucket {bucket_name}.")
+    # Compact separators keep the document small; bucket policies are capped at 20 KB
+    s3_client.put_bucket_policy(Bucket=bucket_name, Policy=json.dumps(policy, separators=(',', ':')))
+    logging.info(f"Updated policy for bucket {bucket_name}.")
 
 def main():
     parser = argparse.ArgumentParser(description="Update S3 bucket policies to deny delete actions.")
     parser.add_argument("bucket_names", nargs='+', help="One or more bucket names to update.")
     args = parser.parse_args()
 
-    s3_client = boto3.client('s3')
+    s3_client = boto3.client('s3', config=BOTO_CFG)
 
-    for bucket_name in args.bucket_names:
-        update_bucket_policy(s3_client, bucket_name)
+    # Each bucket is an independent get/put round trip, so update them in parallel
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(lambda bucket_name: update_bucket_policy(s3_client, bucket_name), args.bucket_names))
 
 if __name__ == "__main__":
     main()
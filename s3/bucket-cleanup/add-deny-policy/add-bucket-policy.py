@@ -1,44 +1,38 @@
 import sys
 import os
 import json
-import tempfile
 import boto3
+from botocore.config import Config
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-s3_client = boto3.client('s3')
+# Number of buckets updated at the same time
+MAX_WORKERS = 16
 
-def apply_bucket_policy(bucket_name, template_file):
+# Client config: a connection per worker thread with headroom, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=2 * MAX_WORKERS, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
 
-    # Check if the template file exists
-    if not os.path.isfile(template_file):
-        logging.error(f"Template file {template_file} not found!")
-        return
+s3_client = boto3.client('s3', config=BOTO_CFG)
 
-    # Read the template file
-    with open(template_file, "r") as template:
-        template_data = template.read()
-        policy_data = template_data.replace("BUCKET_NAME_PLACEHOLDER", bucket_name)
+def apply_bucket_policy(bucket_name, template_file, template_data):
+    """Render an already loaded policy template for the bucket and apply it."""
+    policy_data = template_data.replace("BUCKET_NAME_PLACEHOLDER", bucket_name)
 
-    # Create a temporary file to store the policy
-    with tempfile.NamedTemporaryFile(mode='w', delete=False) as tmp_file:
-        tmp_file.write(policy_data)
-        tmp_file.flush()
+    # Apply the bucket policy; the rendered template is parsed once only to validate it
+    try:
+        json.loads(policy_data)
+        s3_client.put_bucket_policy(Bucket=bucket_name, Policy=policy_data)
 
-        # Apply the bucket policy
-        try:
-            with open(tmp_file.name, "r") as policy:
-                policy_json = json.load(policy)
-                s3_client.put_bucket_policy(Bucket=bucket_name, Policy=json.dumps(policy_json))
+        logging.info(f"Bucket policy from {template_file} applied successfully to {bucket_name}")
+    except Exception as e:
+        logging.error(f"Failed to apply bucket policy from {template_file} to {bucket_name}: {e}")
 
-            logging.info(f"Bucket policy from {template_file} applied successfully to {bucket_name}")
-        except Exception as e:
-            logging.error(f"Failed to apply bucket policy from {template_file} to {bucket_name}: {e}")
-
-def main():
-    if len(sys.argv) < 3:
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
         logging.error("Usage: python script.py <bucket-name1> <bucket-name2> ... <template-file1> <template-file2> ...")
         sys.exit(1)
 
@@ -47,7 +41,7 @@ def main():
     template_files = []
 
     # Collect bucket names and template files based on input arguments
-    for arg in sys.argv[1:]:
+    for arg in argv:
         if os.path.isfile(arg):
             template_files.append(arg)
         else:
@@ -57,9 +51,19 @@ def main():
         logging.error("Error: Provide at least one bucket name and one template file.")
         sys.exit(1)
 
-    for bucket_name in bucket_names:
-        for template_file in template_files:
-            apply_bucket_policy(bucket_name, template_file)
+    # Read each template once; only the bucket name placeholder changes per bucket
+    templates = {}
+    for template_file in template_files:
+        with open(template_file, "r") as template:
+            templates[template_file] = template.read()
+
+    def apply_templates(bucket_name):
+        # A bucket holds one policy, so its templates are applied in order; the buckets themselves run in parallel
+        for template_file, template_data in templates.items():
+            apply_bucket_policy(bucket_name, template_file, template_data)
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(apply_templates, bucket_names))
 
 if __name__ == "__main__":
     main()
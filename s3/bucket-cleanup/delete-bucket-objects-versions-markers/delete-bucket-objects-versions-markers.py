@@ -1,196 +1,308 @@
 import time
 import sys
-import subprocess
 import logging
-import json
-import math
-import random
-from concurrent.futures import ThreadPoolExecutor
+import argparse
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import boto3
+from botocore.config import Config
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Create the S3 client once and reuse it
-s3 = boto3.client('s3')
+# Number of delete batches run at the same time, and how many listed batches may wait for a worker
+MAX_WORKERS = 32
+MAX_PENDING_BATCHES = 2 * MAX_WORKERS
 
-def bucket_exists(bucket_name):
-    """Check if a bucket exists using AWS CLI."""
-    try:
-        result = subprocess.run(
-            ["aws", "s3api", "head-bucket", "--bucket", bucket_name], 
-            capture_output=True, # captures stdout and stderr
-            text=True, # output should be treated as text (strings) rather than bytes
-            check=True # raise a CalledProcessError exception if the command returns a non-zero exit status (indicating failure)
-        )
-        return result.returncode == 0 # return UNIX-like system code 0, succeded
-    except subprocess.CalledProcessError:
-        return False
+# Most listing-and-delete passes over one bucket; a pass only follows one whose deletes partly failed
+MAX_DELETE_PASSES = 3
 
-def get_bucket_stats(bucket_name):
-    """Get the total number and size of objects in a bucket using AWS CLI."""
-    result = subprocess.run(
-        ["aws", "s3api", "list-objects-v2", "--bucket", bucket_name, "--query", "Contents[].Size"],
-        capture_output=True,
-        text=True,
-        check=True
-    )
-    if result.stdout.strip(): # if there is any output from the command after removing any leading and trailing whitespace
-        sizes = json.loads(result.stdout) # parses the JSON-formatted output from the command into a Python list
-        if sizes:
-            total_size = sum(sizes)
-            total_count = len(sizes)
-            return total_count, total_size
-    return 0, 0
-
-def get_bucket_versions_stats(bucket_name):
-    """Get the total number and size of object versions and delete markers in a bucket using AWS CLI."""
-    version_count = 0
-    version_size = 0
-    marker_count = 0
-    marker_size = 0
-    
-    try:
-        result = subprocess.run(
-            ["aws", "s3api", "list-object-versions", "--bucket", bucket_name],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        if result.stdout.strip():
-            versions_info = json.loads(result.stdout)
-            
-            if 'Versions' in versions_info:
-                version_count = len(versions_info['Versions'])
-                version_size = sum(obj['Size'] for obj in versions_info['Versions'])
-            
-            if 'DeleteMarkers' in versions_info:
-                marker_count = len(versions_info['DeleteMarkers'])
-                marker_size = 0  # DeleteMarkers do not have size attribute; added for readibility
-
-        return version_count, version_size, marker_count, marker_size
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Error fetching bucket versions stats: {e}")
-        return 0, 0, 0, 0
+# Seconds the listing thread waits on a full queue before checking whether the consumer has stopped
+PREFETCH_PUT_TIMEOUT = 1
+
+# Number of buckets emptied at the same time; they share the delete workers above
+MAX_PARALLEL_BUCKETS = 16
+
+# Largest page ListObjectsV2 and ListObjectVersions return
+LIST_PAGE_SIZE = 1000
+
+# Most keys a single DeleteObjects call accepts
+DELETE_BATCH_SIZE = 1000
+
+# Units for bytes_to_human_readable, and the number of bytes in each
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+SIZE_DIVISORS = tuple(1 << (10 * i) for i in range(len(SIZE_UNITS)))
+
+# Lifecycle rules for --fast-lifecycle: S3 expires current and noncurrent versions, expired delete markers
+# and incomplete multipart uploads on its own, with no listing or delete requests from this script
+FAST_LIFECYCLE_RULES = [
+    {
+        'ID': 'fast-cleanup-expire-all',
+        'Status': 'Enabled',
+        'Filter': {'Prefix': ''},
+        'Expiration': {'Days': 1},
+        'NoncurrentVersionExpiration': {'NoncurrentDays': 1},
+        'AbortIncompleteMultipartUpload': {'DaysAfterInitiation': 1}
+    },
+    {
+        'ID': 'fast-cleanup-expire-delete-markers',
+        'Status': 'Enabled',
+        'Filter': {'Prefix': ''},
+        'Expiration': {'ExpiredObjectDeleteMarker': True}
+    }
+]
+
+# Client config: a connection per worker plus headroom for the listing, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=2 * MAX_WORKERS, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
+# Create the S3 client once and reuse it
+s3 = boto3.client('s3', config=BOTO_CFG)
 
 def delete_objects_in_page(bucket_name, objects):
-    """Delete a batch of objects in a bucket with exponential backoff."""
+    """Delete a batch of objects in a bucket; SlowDown, throttling and 5xx errors are retried by the client's adaptive retry mode.
+
+    Return the number deleted, the number that failed and the first failure, if any; failures are
+    summarised once per bucket by the caller instead of logged from every worker.
+    """
     if objects:
-        max_retries = 5
-        base_delay = 1  # starting delay in seconds
+        try:
+            # Quiet mode: S3 lists only the keys it failed to delete, not every deleted one
+            response = s3.delete_objects(Bucket=bucket_name, Delete={'Objects': objects, 'Quiet': True})
+            errors = response.get('Errors', [])
+            if errors:
+                logging.debug("Errors: %s", errors)
+                return len(objects) - len(errors), len(errors), errors[0]
+            return len(objects), 0, None
+        except s3.exceptions.ClientError as e:
+            logging.debug("Error deleting objects in page: %s", e)
+            return 0, len(objects), str(e)
+    return 0, 0, None
+
+def full_batches(batches, size=DELETE_BATCH_SIZE):
+    """Regroup listed batches into batches of exactly size keys, with only the last one smaller."""
+    pending = []
+    for objects in batches:
+        pending.extend(objects)
+        while len(pending) >= size:
+            yield pending[:size]
+            pending = pending[size:]
+    if pending:
+        yield pending
 
-        for attempt in range(max_retries):
+def prefetch(batches, maxsize=MAX_PENDING_BATCHES):
+    """Run the listing in its own thread, so the next pages are fetched while the deletes wait for a free worker."""
+    pages = queue.Queue(maxsize=maxsize)
+    done = object()  # Sentinel put after the last page
+    stop = threading.Event()  # Set once the consumer is gone, so the listing thread doesn't block on a full queue forever
+
+    def put(item):
+        """Queue an item for the consumer; return False if the consumer stopped first."""
+        while not stop.is_set():
             try:
-                response = s3.delete_objects(Bucket=bucket_name, Delete={'Objects': objects})
-                deleted = response.get('Deleted', [])
-                if 'Errors' in response:
-                    logging.error(f"Errors: {response['Errors']}")
-                return len(deleted) # number of deleted objects
-            except s3.exceptions.ClientError as e:
-                error_code = e.response['Error']['Code']
-                if error_code == 'SlowDown': # if too much of delete-object requests ...
-                    delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                    logging.error(f"Error deleting objects in page: {e}. Retrying in {delay:.2f} seconds...")
-                    time.sleep(delay) # ... implement delay with exponential backoff
-                else:
-                    logging.error(f"Error deleting objects in page: {e}. Not retrying.")
-                    return 0 # number of deleted objects
-    return 0 # number of deleted objects
-
-def delete_all_versions(bucket_name):
-    """Delete all object versions and delete markers in a bucket."""
-    # To overcome the 1000 records limitation, use paginator
-    paginator = s3.get_paginator('list_object_versions') 
-    start_time = time.time()
+                pages.put(item, timeout=PREFETCH_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for batch in batches:
+                if not put(batch):
+                    return
+        except Exception as e:
+            put(e) # hand listing errors over to the consuming thread
+            return
+        put(done)
 
-    # To make the page deleting concurrently, use ThreadPoolExecutor.
-    # Limiting the number of threads helps manage system resources more efficiently. 
-    # Too many threads can lead to excessive context switching, increased memory usage, and potential system instability.
-    with ThreadPoolExecutor(max_workers=5) as executor:  
+    threading.Thread(target=produce, daemon=True).start()
+    try:
         while True:
-            futures = [] # initializes an empty list to store future objects representing the asynchronous deletion task
-            pages_deleted = 0
-            for page in paginator.paginate(Bucket=bucket_name):
-                objects_to_delete = []
-                if 'Versions' in page:
-                    objects_to_delete.extend([{'Key': version['Key'], 'VersionId': version['VersionId']} for version in page['Versions']])
-                if 'DeleteMarkers' in page:
-                    objects_to_delete.extend([{'Key': marker['Key'], 'VersionId': marker['VersionId']} for marker in page['DeleteMarkers']])
-
-                if objects_to_delete:
-                    futures.append(executor.submit(delete_objects_in_page, bucket_name, objects_to_delete)) # delete paginated objects concurrently
-
-            # Wait for all futures to complete
-            for future in futures:
-                pages_deleted += future.result()
-
-            # Check if any pages were deleted, if none were deleted break the loop
-            if pages_deleted == 0:
-                break
+            batch = pages.get()
+            if batch is done:
+                return
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+    finally:
+        stop.set()
 
-    end_time = time.time()
-    duration = end_time - start_time
-    return duration
+def delete_batches(executor, bucket_name, batches):
+    """Delete batches of objects while they are still being listed; return the number deleted, the number failed and the first failure."""
+    deleted_count = 0
+    failed_count = 0
+    first_error = None
+    pending = set()
 
-def delete_all_objects(bucket_name):
-    """Delete all objects in a bucket."""
-    paginator = s3.get_paginator('list_objects_v2')
+    def collect(future):
+        nonlocal deleted_count, failed_count, first_error
+        deleted, failed, error = future.result()
+        deleted_count += deleted
+        failed_count += failed
+        first_error = first_error or error
+
+    # Under-filled pages are coalesced, so every DeleteObjects call but the last carries the full 1000 keys
+    prefetched = prefetch(full_batches(batches))
+    try:
+        for objects in prefetched:
+            # Keep a bounded window of batches in flight, so the deletes overlap the listing without queueing the whole bucket in memory
+            if len(pending) >= MAX_PENDING_BATCHES:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            pending.add(executor.submit(delete_objects_in_page, bucket_name, objects)) # delete paginated objects concurrently
+
+        # Collect the remaining batches as they complete, not in submission order
+        for future in as_completed(pending):
+            collect(future)
+    except BaseException:
+        # The delete pool is shared with the other buckets, so drop this bucket's queued batches as soon as it fails
+        for future in pending:
+            future.cancel()
+        raise
+    finally:
+        # Stops the listing thread if the loop above ended early
+        prefetched.close()
+    return deleted_count, failed_count, first_error
+
+def delete_all_versions(executor, bucket_name, stats=False):
+    """Delete all object versions and delete markers in a bucket.
+
+    Return the version count, version size and delete marker count seen before deletion
+    (zeros unless stats is set), the number deleted, the number that failed and the time taken.
+    """
+    # To overcome the 1000 records limitation, use paginator
+    paginator = s3.get_paginator('list_object_versions') 
     start_time = time.time()
+    version_count = 0
+    version_size = 0
+    marker_count = 0
 
-    with ThreadPoolExecutor(max_workers=5) as executor:  # Limiting the number of threads
-        futures = []
-        for page in paginator.paginate(Bucket=bucket_name):
-            if 'Contents' in page:
-                objects_to_delete = [{'Key': obj['Key']} for obj in page['Contents']]
-                futures.append(executor.submit(delete_objects_in_page, bucket_name, objects_to_delete))
+    def version_batches(count_stats):
+        nonlocal version_count, version_size, marker_count
+        for page in paginator.paginate(Bucket=bucket_name, PaginationConfig={'PageSize': LIST_PAGE_SIZE}):
+            versions = page.get('Versions', ())
+            markers = page.get('DeleteMarkers', ())
+            # The stats come from the listing the delete needs anyway; they are only counted when asked for,
+            # as summing sizes touches every listed key
+            if count_stats:
+                version_count += len(versions)
+                version_size += sum(version['Size'] for version in versions)
+                marker_count += len(markers)
+            objects_to_delete = [{'Key': version['Key'], 'VersionId': version['VersionId']} for version in versions]
+            objects_to_delete.extend([{'Key': marker['Key'], 'VersionId': marker['VersionId']} for marker in markers])
+            if objects_to_delete:
+                yield objects_to_delete
 
-        # Wait for all futures to complete
-        for future in futures:
-            future.result()
+    # One pass sees every version and delete marker; the deny-PutObject policy the launcher applies first
+    # keeps new ones from appearing, and is_bucket_empty reports any that still do
+    deleted_count, failed_count, first_error = delete_batches(executor, bucket_name, version_batches(stats))
+    # Keys S3 fails individually (InternalError or SlowDown in the response's Errors) are not retried by the
+    # client, which only retries whole requests, so they get a bounded number of further passes
+    passes = 1
+    while failed_count and passes < MAX_DELETE_PASSES:
+        passes += 1
+        logging.warning(f"[{bucket_name}] {failed_count} deletes failed; listing and deleting again (pass {passes}/{MAX_DELETE_PASSES})")
+        deleted, failed_count, first_error = delete_batches(executor, bucket_name, version_batches(False))
+        deleted_count += deleted
+    if failed_count:
+        logging.error(f"[{bucket_name}] Failed to delete {failed_count} versions and delete markers; first error: {first_error}")
 
     end_time = time.time()
     duration = end_time - start_time
-    return duration
+    return version_count, version_size, marker_count, deleted_count, failed_count, duration
+
+def is_bucket_empty(bucket_name):
+    """Check in one request that no object, version or delete marker is left in a bucket."""
+    response = s3.list_object_versions(Bucket=bucket_name, MaxKeys=1)
+    return not response.get('Versions') and not response.get('DeleteMarkers')
 
 def bytes_to_human_readable(size_in_bytes):
     """Convert bytes to a human-readable format."""
     if size_in_bytes is None or size_in_bytes == 0:
         return "0B"
-    size_name = ("B", "KB", "MB", "GB", "TB")
-    i = int(math.floor(math.log(size_in_bytes, 1024)))
-    p = math.pow(1024, i)
-    s = round(size_in_bytes / p, 2)
-    return f"{s} {size_name[i]}"
-
-def main():
-    if len(sys.argv) < 2: # checks if at least one bucket name is provided, if not then:
-        logging.error("Usage: python delete_s3_objects.py <bucket-name1> <bucket-name2> ...")
-        sys.exit(1)
+    # Every unit is 1024 (2**10) times the previous one, so the unit index is the bit length divided by 10
+    i = min((size_in_bytes.bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+    s = round(size_in_bytes / SIZE_DIVISORS[i], 2)
+    return f"{s} {SIZE_UNITS[i]}"
 
-    start_time = time.time()
-    bucket_names = sys.argv[1:] # assing the list of arguments (bucket names) to the var bucket_names
-
-    for bucket_name in bucket_names:
-        if bucket_exists(bucket_name):
-            obj_duration = delete_all_objects(bucket_name)
-            version_duration = delete_all_versions(bucket_name)
-
-            post_delete_count, post_delete_size = get_bucket_stats(bucket_name)
-            post_version_count, post_version_size, post_marker_count, post_marker_size = get_bucket_versions_stats(bucket_name)
-            total_bucket_size_after = post_delete_size + post_version_size + post_marker_size
-
-            # Log only the stats after deletion
-            logging.info(f"Total Object Count After Deletion: {post_delete_count}")
-            logging.info(f"Total Object Size After Deletion: {bytes_to_human_readable(post_delete_size)}")
-            logging.info(f"Total Version Count After Deletion: {post_version_count}")
-            logging.info(f"Total Version Size After Deletion: {bytes_to_human_readable(post_version_size)}")
-            logging.info(f"Total Delete Marker Count After Deletion: {post_marker_count}")
-            logging.info(f"Total Delete Marker Size After Deletion: {bytes_to_human_readable(post_marker_size)}")
-            logging.info(f"Total Bucket Size After Deletion: {bytes_to_human_readable(total_bucket_size_after)}")
-            logging.info(f"Time to delete objects: {obj_duration:.2f} seconds")
-            logging.info(f"Time to delete versions and delete markers: {version_duration:.2f} seconds")
+def apply_fast_lifecycle(bucket_name):
+    """Hand the cleanup over to S3 with lifecycle rules that expire every object, version, delete marker and incomplete upload."""
+    # Replaces the bucket's existing lifecycle configuration. On a versioned bucket the current versions expire first
+    # and only then become noncurrent versions and delete markers, which later lifecycle runs remove
+    s3.put_bucket_lifecycle_configuration(Bucket=bucket_name, LifecycleConfiguration={'Rules': FAST_LIFECYCLE_RULES})
+    logging.info(f"Applied expire-everything lifecycle rules to '{bucket_name}'; S3 will empty it asynchronously, which can take several days on a versioned bucket.")
+
+def process_bucket(executor, bucket_name, fast_lifecycle=False, stats=False):
+    """Empty one bucket, or hand it over to lifecycle expiration, and log the outcome; return False if the bucket was not emptied."""
+    # No HeadBucket up front: the first real request reports a missing bucket itself
+    try:
+        if fast_lifecycle:
+            apply_fast_lifecycle(bucket_name)
         else:
-            logging.warning(f"Bucket '{bucket_name}' does not exist.")
+            # ListObjectVersions returns the current version of every object too (VersionId 'null' on a bucket that
+            # never had versioning), and deletes by VersionId are permanent, so deleting every listed version empties any bucket
+            pre_version_count, pre_version_size, pre_marker_count, version_count, failed_count, version_duration = delete_all_versions(executor, bucket_name, stats)
+
+            if stats:
+                logging.info(f"[{bucket_name}] Total Version Count Before Deletion (current and noncurrent): {pre_version_count}")
+                logging.info(f"[{bucket_name}] Total Version Size Before Deletion: {bytes_to_human_readable(pre_version_size)}")
+                logging.info(f"[{bucket_name}] Total Delete Marker Count Before Deletion: {pre_marker_count}")
+
+            # Report the counts the delete already returned; a single request confirms nothing is left,
+            # instead of listing the whole bucket again
+            logging.info(f"[{bucket_name}] Versions and Delete Markers Deleted: {version_count}")
+            logging.info(f"[{bucket_name}] Time to delete versions and delete markers: {version_duration:.2f} seconds")
+            # Failed deletes were already summarised at ERROR by delete_all_versions
+            if failed_count:
+                return False
+            if not is_bucket_empty(bucket_name):
+                logging.error(f"Bucket '{bucket_name}' still holds objects, versions or delete markers.")
+                return False
+            logging.info(f"Bucket '{bucket_name}' is empty.")
+    except s3.exceptions.NoSuchBucket:
+        # Nothing to empty, which is not a failure
+        logging.warning(f"Bucket '{bucket_name}' does not exist.")
+    except s3.exceptions.ClientError as e:
+        logging.error(f"Error cleaning up bucket '{bucket_name}': {e}")
+        return False
+    return True
+
+def process_buckets(executor, bucket_names, fast_lifecycle=False, stats=False):
+    """Empty the buckets, several at once, with their delete batches running on the given pool; return False if any failed."""
+    if len(bucket_names) == 1:
+        return process_bucket(executor, bucket_names[0], fast_lifecycle, stats)
+    # Buckets are independent, so list and delete several at once; the shared delete pool still bounds
+    # the DeleteObjects calls in flight across all of them
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_BUCKETS, len(bucket_names))) as bucket_pool:
+        results = list(bucket_pool.map(lambda bucket_name: process_bucket(executor, bucket_name, fast_lifecycle, stats), bucket_names))
+    return all(results)
+
+def main(argv=None, executor=None):
+    """Parse the arguments and empty the buckets; a caller running this in-process can pass its own delete pool as executor."""
+    parser = argparse.ArgumentParser(description="Delete all objects, object versions and delete markers in S3 buckets.")
+    parser.add_argument("bucket_names", nargs='+', help="Names of the S3 buckets to empty")
+    parser.add_argument("--fast-lifecycle", action="store_true",
+                        help="Instead of listing and deleting, set lifecycle rules so S3 expires the bucket contents itself over the next days; "
+                             "returns immediately, so the bucket can't be deleted right after. Standalone use only, the launcher never passes it")
+    parser.add_argument("--stats", action=argparse.BooleanOptionalAction, default=False,
+                        help="Log the version and delete marker counts and sizes before deletion, as counted during the delete pass")
+    args = parser.parse_args(argv)
+
+    start_time = time.time()
+    bucket_names = args.bucket_names
+
+    # To make the page deleting concurrently, use ThreadPoolExecutor. One pool serves every bucket and pass,
+    # so its threads and their pooled HTTPS connections stay warm from one bucket to the next.
+    # S3 accepts far more concurrent DeleteObjects calls than the old 5 workers sent; the pool is still bounded,
+    # and the client's connection pool is sized to match, since every worker holds one HTTPS connection.
+    # The launcher passes one pool shared by all the buckets it processes at once, so their deletes stay within MAX_WORKERS
+    if executor is not None:
+        success = process_buckets(executor, bucket_names, args.fast_lifecycle, args.stats)
+    else:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            success = process_buckets(executor, bucket_names, args.fast_lifecycle, args.stats)
 
     end_time = time.time()
     total_duration = end_time - start_time
@@ -198,5 +310,9 @@ def main():
     # Print summary of operations
     logging.info(f"Total script duration: {total_duration:.2f} seconds")
 
+    # Exit non-zero if any bucket failed, so the launcher stops before deleting it
+    if not success:
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
@@ -1,12 +1,16 @@
 import sys
 import boto3
+from botocore.config import Config
 import logging
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Client config: adaptive retries on throttling, keep-alive on the reused connections
+BOTO_CFG = Config(retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
 # Create the S3 client once and reuse it
-s3 = boto3.client('s3')
+s3 = boto3.client('s3', config=BOTO_CFG)
 
 def bucket_exists(bucket_name):
     """Check if a bucket exists."""
@@ -29,13 +33,14 @@ def delete_bucket(bucket_name):
     except s3.exceptions.ClientError as e:
         logging.error(f"Error deleting bucket '{bucket_name}': {e}")
 
-def main():
+def main(argv=None):
     """Main function to check and delete empty buckets."""
-    if len(sys.argv) < 2:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 1:
         logging.error("Usage: python delete_s3_buckets_if_empty.py <bucket-name1> <bucket-name2> ...")
         sys.exit(1)
 
-    bucket_names = sys.argv[1:]
+    bucket_names = argv
     for bucket_name in bucket_names:
         if bucket_exists(bucket_name):
             if is_bucket_empty(bucket_name):
@@ -9,8 +9,8 @@
 aws s3api list-object-versions --bucket a-bucket-name \
     --query "DeleteMarkers[].[Key, VersionId]" \
     --output text > delete_markers.txt
-# format properly 
-jq -R -s -c 'split("\n") | .[:-1] | map(split("\t")) | {Objects: map({Key: .[0], VersionId: .[1]})}' delete_markers.txt > delete_markers.json
+# format properly; Quiet makes S3 answer with the failed keys only, not every deleted one
+jq -R -s -c 'split("\n") | .[:-1] | map(split("\t")) | {Objects: map({Key: .[0], VersionId: .[1]}), Quiet: true}' delete_markers.txt > delete_markers.json
 # delete 
 aws s3api delete-objects --bucket a-bucket-name \
     --delete file://delete_markers.json
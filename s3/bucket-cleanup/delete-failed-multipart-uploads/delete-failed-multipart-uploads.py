@@ -1,32 +1,56 @@
 import sys
 import boto3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 
-s3_client = boto3.client('s3')
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Number of multipart uploads aborted at the same time
+MAX_WORKERS = 32
+
+# Largest page ListMultipartUploads returns
+LIST_PAGE_SIZE = 1000
+
+# Client config: a connection per worker thread with headroom, adaptive retries on throttling
+BOTO_CFG = Config(max_pool_connections=2 * MAX_WORKERS, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
+s3_client = boto3.client('s3', config=BOTO_CFG)
+
+def abort_multipart_upload(bucket_name, upload):
+    s3_client.abort_multipart_upload(
+        Bucket=bucket_name,
+        Key=upload['Key'],
+        UploadId=upload['UploadId']
+    )
+    # Per-upload lines only at debug level; the run logs a single count per bucket
+    logging.debug("Aborted multipart upload: %s with UploadId: %s", upload['Key'], upload['UploadId'])
 
 def delete_failed_multipart_uploads(bucket_name):
 
     try:
-        multipart_uploads = s3_client.list_multipart_uploads(Bucket=bucket_name)
-        if 'Uploads' in multipart_uploads:
-            for upload in multipart_uploads['Uploads']:
-                s3_client.abort_multipart_upload(
-                    Bucket=bucket_name,
-                    Key=upload['Key'],
-                    UploadId=upload['UploadId']
-                )
-                print(f"Aborted multipart upload: {upload['Key']} with UploadId: {upload['UploadId']}")
+        # A single call returns at most 1000 uploads, so page through all of them
+        paginator = s3_client.get_paginator('list_multipart_uploads')
+        uploads = [upload for page in paginator.paginate(Bucket=bucket_name, PaginationConfig={'PageSize': LIST_PAGE_SIZE}) for upload in page.get('Uploads', ())]
+        if uploads:
+            # Each abort is an independent request, so send them concurrently
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                list(executor.map(lambda upload: abort_multipart_upload(bucket_name, upload), uploads))
+            logging.info(f"Aborted {len(uploads)} failed multipart uploads for bucket: {bucket_name}")
         else:
-            print(f"No failed multipart uploads found for bucket: {bucket_name}")
+            logging.info(f"No failed multipart uploads found for bucket: {bucket_name}")
     except Exception as e:
-        print(f"Failed to check or delete multipart uploads for {bucket_name}: {e}")
+        logging.error(f"Failed to check or delete multipart uploads for {bucket_name}: {e}")
         sys.exit(1)
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python script.py <bucket-name>")
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 1:
+        logging.error("Usage: python script.py <bucket-name>")
         sys.exit(1)
 
-    bucket_name = sys.argv[1]
+    bucket_name = argv[0]
     delete_failed_multipart_uploads(bucket_name)
 
 if __name__ == "__main__":
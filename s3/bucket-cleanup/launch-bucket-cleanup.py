@@ -1,78 +1,193 @@
 import subprocess
+import importlib.util
 import time
 import argparse
 import logging
+import logging.handlers
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
+from pathlib import Path
 import boto3
+from botocore.config import Config
 import re
 
+# The log format shows neither thread nor process, so don't collect them for every record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+# Stage scripts already imported into this process, keyed by script path
+LOADED_SCRIPTS = {}
+
+# Guards LOADED_SCRIPTS, so two buckets starting together import a stage script only once
+LOAD_LOCK = threading.Lock()
+
+# Stage that empties a bucket; in-process, all buckets share one delete pool for it
+VERSIONS_SCRIPT = "delete-bucket-objects-versions-markers/delete-bucket-objects-versions-markers.py"
+
+# Default number of buckets cleaned up at the same time
+DEFAULT_WORKERS = 10
+
+# Interpreter for --subprocess runs: the one running the launcher, without a PATH lookup per run
+PYTHON = sys.executable
+
+# Client config: adaptive retries on throttling, keep-alive on the reused connections
+BOTO_CFG = Config(retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True)
+
+def error_log_path(log_file):
+    """Return the path of the errors-only log kept next to the given log file."""
+    log_path = Path(log_file)
+    return str(log_path.with_name(log_path.stem + '__errors' + log_path.suffix))
+
 def setup_logger(log_file):
-    """Setup logger to log messages to both console and file."""
+    """Setup logger to log messages to the console, the log file and, for errors, a separate error log."""
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
     # Create handlers
     console_handler = logging.StreamHandler()
     file_handler = logging.FileHandler(log_file)
+    # delay: the error log is only created once an error is logged, so a clean run leaves none behind
+    error_handler = logging.FileHandler(error_log_path(log_file), delay=True)
+    error_handler.setLevel(logging.ERROR)
 
     # Create formatters and add them to the handlers
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', '%Y-%m-%d %H:%M:%S')
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
+    error_handler.setFormatter(formatter)
 
     # Add handlers to the logger
     logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Buffer file writes; errors and a full buffer flush straight through
+    logger.addHandler(logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=file_handler))
+    logger.addHandler(error_handler)
 
-def log_unique_lines(log_func, message):
-    """Log each line in the message uniquely."""
+def log_unique_lines(level, lines):
+    """Log each line uniquely as it arrives."""
     seen_lines = set() # to keep track of lines that have already been logged
-    for line in message.splitlines(): # splits the message into individual lines 
+    # Lines are still drained when the level is filtered out, so the child never blocks on a full pipe
+    enabled = logging.getLogger().isEnabledFor(level)
+    for line in lines:
+        line = line.rstrip('\n')
         if line not in seen_lines:
-            log_func(line)
             seen_lines.add(line)
+            if enabled:
+                logging.log(level, line)
+
+def child_env(session):
+    """Return the environment for a child script, carrying the launcher's already resolved credentials and region."""
+    env = dict(os.environ)
+    # Environment credentials come first in the credential chain, so the child skips profile, SSO or
+    # assume-role resolution; frozen credentials are refreshed here first if they are about to expire
+    credentials = session.get_credentials()
+    if credentials:
+        frozen = credentials.get_frozen_credentials()
+        env['AWS_ACCESS_KEY_ID'] = frozen.access_key
+        env['AWS_SECRET_ACCESS_KEY'] = frozen.secret_key
+        if frozen.token:
+            env['AWS_SESSION_TOKEN'] = frozen.token
+        else:
+            env.pop('AWS_SESSION_TOKEN', None)
+    if session.region_name:
+        env['AWS_DEFAULT_REGION'] = session.region_name
+    return env
 
-def run_script(script_path, script_args, retries=15, delay=10):
+def run_script(script_path, script_args, env=None):
     """Run a script with arguments and wait for it to finish."""
-    attempt = 0
-    while attempt < retries:
-        try:
-            result = subprocess.run(["python", script_path] + script_args, check=True, capture_output=True, text=True)
-            logging.info(f"Output of {script_path}:\n")
-            if result.stdout:
-                log_unique_lines(logging.info, result.stdout)
-            if result.stderr:
-                log_unique_lines(logging.info, result.stderr)
-            return True
-        except subprocess.CalledProcessError as e:
-            if e.stdout:
-                log_unique_lines(logging.error, e.stdout)
-            if e.stderr:
-                log_unique_lines(logging.error, e.stderr)
-                if "SlowDown" in e.stderr:
-                    attempt += 1
-                    logging.error(f"SlowDown error encountered. Retrying in {delay} seconds... (Attempt {attempt}/{retries})")
-                    time.sleep(delay)
-                else:
-                    return False
-    return False
+    logging.info("Output of %s:\n", script_path)
+    # Stream the merged stdout and stderr line by line, so output is logged while the script
+    # runs and is never held in memory as a whole
+    with subprocess.Popen([PYTHON, script_path, *script_args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          text=True, bufsize=1, env=env) as process:
+        log_unique_lines(logging.INFO, process.stdout)
+    if process.returncode != 0:
+        # SlowDown is retried per request by the scripts' adaptive-retry clients, so a failed run is final
+        logging.error(f"{script_path} exited with code {process.returncode}")
+        return False
+    return True
+
+def load_script(script_path):
+    """Import a stage script once and return the module; the file names have dashes, so they are loaded by path."""
+    with LOAD_LOCK:
+        module = LOADED_SCRIPTS.get(script_path)
+        if module is None:
+            module_name = os.path.splitext(os.path.basename(script_path))[0].replace('-', '_')
+            spec = importlib.util.spec_from_file_location(module_name, script_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            LOADED_SCRIPTS[script_path] = module
+        return module
+
+def run_script_in_process(script_path, script_args, **kwargs):
+    """Call a stage script's main() in this process; boto3 and the script's client are only set up on its first call."""
+    try:
+        load_script(script_path).main(script_args, **kwargs)
+    except SystemExit as e:
+        # The scripts report failure through sys.exit, just as they do on the command line
+        return not e.code
+    except Exception as e:
+        logging.error(f"{script_path} failed: {e}")
+        return False
+    return True
+
+def parse_date(value):
+    """Parse a YYYY-MM-DDTHH:MM:SSZ date-time into an aware UTC datetime."""
+    # fromisoformat is much cheaper than strptime; Pythons before 3.11 don't accept the Z suffix
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    # A date-time given without an offset is taken as UTC, as the help text says
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
 def list_buckets_created_between(s3_client, cutoff_date, until_date):
-    """List all S3 buckets created between the specified cutoff date and until date."""
-    buckets_to_delete = []
+    """Yield the names of the S3 buckets created between the specified cutoff date and until date."""
     response = s3_client.list_buckets()
     for bucket in response['Buckets']:
-        creation_date = bucket['CreationDate']
-        if cutoff_date < creation_date <= until_date:
-            buckets_to_delete.append(bucket['Name'])
-    return buckets_to_delete
+        if cutoff_date < bucket['CreationDate'] <= until_date:
+            yield bucket['Name']
 
 def filter_buckets_by_pattern(bucket_names, pattern):
-    """Filter bucket names by a case-insensitive pattern."""
-    regex = re.compile(pattern, re.IGNORECASE)
-    return [bucket for bucket in bucket_names if regex.search(bucket)]
+    """Filter bucket names by a case-insensitive pattern, lazily."""
+    # filter() calls the compiled pattern's bound search directly, without a Python-level loop
+    return filter(re.compile(pattern, re.IGNORECASE).search, bucket_names)
+
+def process_bucket(bucket_name, session, lifecycle_rules_wait=0, use_subprocess=False, delete_executor=None):
+    """Run every cleanup script for one bucket in order; return False as soon as one fails."""
+    logging.info(f"Processing bucket: {bucket_name}")
+
+    # List of scripts to run in the given order with their respective arguments
+    scripts = [
+        ("add-deny-policy/add-bucket-policy.py", [bucket_name, "add-deny-policy/deny-bucket-policy-template.json"]),
+        ("set-lifecycle-rule/set-lifecycle-rule.py", [bucket_name, "set-lifecycle-rule/lifecycle-policy-01.json", "set-lifecycle-rule/lifecycle-policy-02.json"]),
+        (VERSIONS_SCRIPT, [bucket_name]),
+        ("delete-failed-multipart-uploads/delete-failed-multipart-uploads.py", [bucket_name]),
+        ("delete-bucket/delete-bucket.py", [bucket_name])
+    ]
+
+    # Extra keyword arguments for a stage's main() when it runs in-process
+    stage_kwargs = {VERSIONS_SCRIPT: {'executor': delete_executor}} if delete_executor else {}
+
+    for script_path, script_args in scripts:
+        logging.info(f"STARTING SCRIPT RUN -- {script_path}")
+        logging.info(f"Running {script_path} with arguments {script_args}...")
+        if use_subprocess:
+            succeeded = run_script(script_path, script_args, env=child_env(session))
+        else:
+            succeeded = run_script_in_process(script_path, script_args, **stage_kwargs.get(script_path, {}))
+        if succeeded:
+            logging.info(f"Finished running {script_path}.\n")
+        else:
+            logging.error(f"Failed to run {script_path}.\n")
+            return False
+
+        # If the current script is the lifecycle rule script, wait for the specified time
+        if script_path == "set-lifecycle-rule/set-lifecycle-rule.py" and lifecycle_rules_wait > 0:
+            logging.info(f"Waiting for {lifecycle_rules_wait} minutes before proceeding to the next script...")
+            time.sleep(lifecycle_rules_wait * 60)  # Convert minutes to seconds
+
+    return True
 
 def main():
     parser = argparse.ArgumentParser(description="Run a series of S3 bucket management scripts.")
@@ -83,6 +198,8 @@ def main():
     parser.add_argument("--lifecycle-rules-wait", "-w", type=int, default=0, help="Minutes to wait after setting lifecycle rules")
     parser.add_argument("--log-file", "-l", help="Log file to store the output")
     parser.add_argument("--log-dir", "-d", help="Directory to store the log file", default="./.script-logs")
+    parser.add_argument("--workers", "-n", type=int, default=DEFAULT_WORKERS, help="Number of buckets processed at the same time")
+    parser.add_argument("--subprocess", "-s", action="store_true", help="Run each script in its own Python process instead of importing it")
     
     args = parser.parse_args()
 
@@ -93,7 +210,7 @@ def main():
     # Parse the dates if provided
     if args.cutoff_date:
         try:
-            cutoff_date = datetime.strptime(args.cutoff_date, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+            cutoff_date = parse_date(args.cutoff_date)
         except ValueError:
             logging.error("Incorrect cutoff date-time format. Use YYYY-MM-DDTHH:MM:SSZ (UTC).")
             sys.exit(1)
@@ -102,7 +219,7 @@ def main():
 
     if args.until_date:
         try:
-            until_date = datetime.strptime(args.until_date, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+            until_date = parse_date(args.until_date)
         except ValueError:
             logging.error("Incorrect until date-time format. Use YYYY-MM-DDTHH:MM:SSZ (UTC).")
             sys.exit(1)
@@ -118,20 +235,26 @@ def main():
     # Setup logger
     setup_logger(log_file)
 
-    s3_client = boto3.client('s3')
+    # One session resolves the credentials once; with --subprocess the child scripts get them through their environment
+    session = boto3.session.Session()
+    # In-process stage scripts create their clients with boto3.client(), which goes through the default session;
+    # making it this session lets every stage share its credentials, region and loaded service models
+    boto3.DEFAULT_SESSION = session
+    s3_client = session.client('s3', config=BOTO_CFG)
 
     # Get bucket names based on arguments
+    # The listing and the pattern filter are lazy; the dedupe below walks them in a single pass
     bucket_names = []
     if args.buckets:
-        bucket_names.extend(args.buckets)
+        bucket_names = args.buckets
     else:
         if args.cutoff_date or args.until_date:
-            bucket_names.extend(list_buckets_created_between(s3_client, cutoff_date, until_date))
+            bucket_names = list_buckets_created_between(s3_client, cutoff_date, until_date)
         if args.pattern:
             bucket_names = filter_buckets_by_pattern(bucket_names, args.pattern)
 
-    # Remove duplicates
-    bucket_names = list(set(bucket_names))
+    # Remove duplicates, keeping the order the buckets were given or listed in
+    bucket_names = list(dict.fromkeys(bucket_names))
 
     logging.info(f"Found {len(bucket_names)} buckets to be processed.")
 
@@ -139,62 +262,49 @@ def main():
         print("No buckets found to process.")
         sys.exit(0)
 
-    print("Buckets to be processed:")
-    for bucket in bucket_names:
-        print(f" - {bucket}")
+    # One write for the whole list instead of a line-buffered write per bucket
+    print("Buckets to be processed:\n" + "\n".join(f" - {bucket}" for bucket in bucket_names), flush=True)
 
     confirm_all = input("Do you want to delete them all? (yes/no): ").strip().lower()
     delete_all = confirm_all == 'yes'
 
-    success = True  # Track the success of script runs
-
+    # Collect confirmations up front so the worker threads never contend on stdin
+    confirmed_buckets = []
     for bucket_name in bucket_names:
         if not delete_all:
             confirm_each = input(f"Do you want to delete the bucket {bucket_name}? (yes/no): ").strip().lower()
             if confirm_each != 'yes':
                 logging.info(f"Skipping deletion of bucket: {bucket_name}")
                 continue
+        confirmed_buckets.append(bucket_name)
 
-        logging.info(f"Processing bucket: {bucket_name}")
-
-        # List of scripts to run in the given order with their respective arguments
-        scripts = [
-            ("add-deny-policy/add-bucket-policy.py", [bucket_name, "add-deny-policy/deny-bucket-policy-template.json"]),
-            ("set-lifecycle-rule/set-lifecycle-rule.py", [bucket_name, "set-lifecycle-rule/lifecycle-policy-01.json", "set-lifecycle-rule/lifecycle-policy-02.json"]),
-            ("delete-bucket-objects-versions-markers/delete-bucket-objects-versions-markers.py", [bucket_name]),
-            ("delete-failed-multipart-uploads/delete-failed-multipart-uploads.py", [bucket_name]),
-            ("delete-bucket/delete-bucket.py", [bucket_name])
-        ]
-
-        for script_path, script_args in scripts:
-            logging.info(f"STARTING SCRIPT RUN -- {script_path}")
-            logging.info(f"Running {script_path} with arguments {script_args}...")
-            if run_script(script_path, script_args):
-                logging.info(f"Finished running {script_path}.\n")
-            else:
-                logging.error(f"Failed to run {script_path} after maximum retries.\n")
-                success = False
-                break
-
-            # If the current script is the lifecycle rule script, wait for the specified time
-            if script_path == "set-lifecycle-rule/set-lifecycle-rule.py" and args.lifecycle_rules_wait > 0:
-                logging.info(f"Waiting for {args.lifecycle_rules_wait} minutes before proceeding to the next script...")
-                time.sleep(args.lifecycle_rules_wait * 60)  # Convert minutes to seconds
-
-        if not success:
-            break
-
-    # Rename the log file if any script failed; assign exit_code value for later call
-    if not success:
-        error_log_file = log_file.replace('.log', '__errorred.log')
-        os.rename(log_file, error_log_file)
-        log_file = error_log_file
-        exit_code = 1
-    else:
-        exit_code = 0
+    success = True  # Track the success of script runs
 
-    # Print out the log file location at the end
+    # Buckets are independent, so their pipelines run side by side; each bucket's scripts stay in order
+    if confirmed_buckets:
+        # In-process, every bucket's delete batches run on one pool, so the concurrent buckets don't each start
+        # their own workers and contend for the script's client connections
+        delete_executor = None if args.subprocess else ThreadPoolExecutor(max_workers=load_script(VERSIONS_SCRIPT).MAX_WORKERS)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(confirmed_buckets)))) as executor:
+                futures = {executor.submit(process_bucket, bucket_name, session, args.lifecycle_rules_wait, args.subprocess, delete_executor): bucket_name
+                           for bucket_name in confirmed_buckets}
+                for future in as_completed(futures):
+                    try:
+                        bucket_succeeded = future.result()
+                    except Exception as e:
+                        logging.error(f"Error processing bucket {futures[future]}: {e}")
+                        bucket_succeeded = False
+                    success = success and bucket_succeeded
+        finally:
+            if delete_executor is not None:
+                delete_executor.shutdown()
+
+    # Print out the log file location at the end; the errors were written to their own log as they happened
     print(f"THE LOG FILE LOCATION IS: {log_file}")
+    if not success:
+        print(f"THE ERROR LOG FILE LOCATION IS: {error_log_path(log_file)}")
+    exit_code = 0 if success else 1
     
     sys.exit(exit_code)
 
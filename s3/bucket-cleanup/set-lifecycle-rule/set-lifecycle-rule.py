@@ -1,15 +1,24 @@
 import sys
 import os
 import json
+from functools import lru_cache
 import boto3
+from botocore.config import Config
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def apply_combined_lifecycle_policy(bucket_name, policy_files):
-    s3_client = boto3.client('s3')
+# Create the S3 client once and reuse it
+s3_client = boto3.client('s3', config=Config(max_pool_connections=64, retries={'max_attempts': 10, 'mode': 'adaptive'}, tcp_keepalive=True))
 
+# The launcher calls this script once per bucket in the same process, so each policy file is read and parsed only once
+@lru_cache(maxsize=None)
+def load_policy_rules(policy_file):
+    with open(policy_file, 'r') as file:
+        return tuple(json.load(file)["Rules"])
+
+def apply_combined_lifecycle_policy(s3_client, bucket_name, policy_files):
     combined_policies = {
         "Rules": []
     }
@@ -20,9 +29,7 @@ def apply_combined_lifecycle_policy(bucket_name, policy_files):
             logging.error(f"Lifecycle policy file {policy_file} not found!")
             sys.exit(1)
 
-        with open(policy_file, 'r') as file:
-            policy_json = json.load(file)
-            combined_policies["Rules"].extend(policy_json["Rules"])
+        combined_policies["Rules"].extend(load_policy_rules(policy_file))
 
     # Apply the combined lifecycle policy
     try:
@@ -35,15 +42,16 @@ def apply_combined_lifecycle_policy(bucket_name, policy_files):
         logging.error(f"Failed to apply combined lifecycle rules to {bucket_name}: {e}")
         sys.exit(1)
 
-def main():
-    if len(sys.argv) < 3:
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
         logging.error("Usage: python script.py <bucket-name> <lifecycle-policy1> <lifecycle-policy2> ...")
         sys.exit(1)
 
-    bucket_name = sys.argv[1]
-    lifecycle_policy_files = sys.argv[2:]
+    bucket_name = argv[0]
+    lifecycle_policy_files = argv[1:]
 
-    apply_combined_lifecycle_policy(bucket_name, lifecycle_policy_files)
+    apply_combined_lifecycle_policy(s3_client, bucket_name, lifecycle_policy_files)
 
 if __name__ == "__main__":
     main()